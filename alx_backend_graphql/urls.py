@@ -1,10 +1,16 @@
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 from alx_backend_graphql.schema import schema
+from crm.views import (
+    AsyncCRMGraphQLView, CRMGraphQLView, document_cache_stats, export_view, metrics_view,
+)
 
 urlpatterns = [
-    path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path("graphql", csrf_exempt(CRMGraphQLView.as_view(graphiql=True, schema=schema))),
+    path("graphql/async", csrf_exempt(AsyncCRMGraphQLView.as_view(graphiql=True, schema=schema))),
+    path("graphql/cache", document_cache_stats),
+    path("metrics", metrics_view),
+    path("export/<str:kind>", export_view),
     path('admin/', admin.site.urls),
 ]
@@ -0,0 +1,19 @@
+import asyncio
+
+
+def running_async():
+    """True when called on an event loop thread, i.e. from the async GraphQL view.
+
+    Code there must use the async ORM (or sync_to_async): Django raises
+    SynchronousOnlyOperation for synchronous queries made on the loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def alist(queryset):
+    """Evaluate ``queryset`` with the async ORM."""
+    return [row async for row in queryset]
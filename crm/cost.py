@@ -0,0 +1,149 @@
+from django.conf import settings
+from graphene.relay import Connection
+from graphene_django.settings import graphene_settings
+from graphql.language import ast
+from graphql.type.definition import GraphQLList, GraphQLNonNull, get_named_type
+
+# ===== Query Cost Analysis =====
+# Runs on the parsed document before execution. The cost of a query is the
+# number of rows it can touch: every object field costs the rows of its
+# parent times its own fan-out, which for a connection is the page it asks
+# for (first/last plus any offset) and for a plain list DEFAULT_LIST_SIZE.
+# Relay wrappers (edges, node, pageInfo) cost nothing themselves.
+
+CONNECTION_WRAPPERS = ("edges", "node", "pageInfo")
+
+
+class QueryCostError(Exception):
+    pass
+
+
+def cost_settings():
+    options = {"MAX_COST": 20000, "MAX_DEPTH": 6, "DEFAULT_LIST_SIZE": 20}
+    options.update(getattr(settings, "GRAPHQL_QUERY_COST", {}))
+    return options
+
+
+def _value(node, variables):
+    if isinstance(node, ast.Variable):
+        value = variables.get(node.name.value)
+        return value if isinstance(value, int) else None
+    if isinstance(node, ast.IntValue):
+        return int(node.value)
+    return None
+
+
+def _is_connection(graphql_type):
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    return isinstance(graphene_type, type) and issubclass(graphene_type, Connection)
+
+
+def _is_list(graphql_type):
+    if isinstance(graphql_type, GraphQLNonNull):
+        graphql_type = graphql_type.of_type
+    return isinstance(graphql_type, GraphQLList)
+
+
+class QueryCost:
+    def __init__(self, schema, document_ast, variables=None, operation_name=None):
+        self.schema = schema
+        self.variables = dict(variables or {})
+        self.options = cost_settings()
+        self.max_page_size = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        self.fragments = {}
+        self.operation = None
+        for definition in document_ast.definitions:
+            if isinstance(definition, ast.FragmentDefinition):
+                self.fragments[definition.name.value] = definition
+            elif isinstance(definition, ast.OperationDefinition):
+                name = definition.name.value if definition.name else None
+                if operation_name in (None, name):
+                    self.operation = definition
+        self.cost = 0
+        self.depth = 0
+
+    def page_size(self, field_name, arguments):
+        args = {arg.name.value: _value(arg.value, self.variables) for arg in arguments}
+        for name in ("first", "last", "offset"):
+            if args.get(name) is not None and args[name] < 0:
+                raise QueryCostError(f"{name} on {field_name} must not be negative")
+        page = args.get("first")
+        if page is None:
+            page = args.get("last")
+        if page is None:
+            page = self.max_page_size
+        if self.max_page_size and page > self.max_page_size:
+            raise QueryCostError(
+                f"Requested page size {page} on {field_name} exceeds the "
+                f"maximum of {self.max_page_size}"
+            )
+        return page + (args.get("offset") or 0)
+
+    def visit(self, parent_type, selection_set, rows, depth):
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.FragmentSpread):
+                fragment = self.fragments[selection.name.value]
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                self.visit(fragment_type, fragment.selection_set, rows, depth)
+                continue
+            if isinstance(selection, ast.InlineFragment):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                self.visit(fragment_type, selection.selection_set, rows, depth)
+                continue
+
+            field = getattr(parent_type, "fields", {}).get(selection.name.value)
+            if field is None or selection.selection_set is None:
+                continue
+            field_type = get_named_type(field.type)
+            name = selection.name.value
+
+            if name in CONNECTION_WRAPPERS and parent_type.name.endswith(("Connection", "Edge")):
+                self.visit(field_type, selection.selection_set, rows, depth)
+                continue
+
+            if _is_connection(field_type):
+                field_rows = rows * self.page_size(name, selection.arguments)
+            elif _is_list(field.type):
+                field_rows = rows * self.options["DEFAULT_LIST_SIZE"]
+            else:
+                field_rows = rows
+            # A field can only add to the cost, never offset its siblings.
+            field_rows = max(field_rows, 0)
+            self.cost += field_rows
+            self.depth = max(self.depth, depth + 1)
+            if self.depth > self.options["MAX_DEPTH"]:
+                raise QueryCostError(
+                    f"Query nests deeper than the maximum depth of {self.options['MAX_DEPTH']}"
+                )
+            self.visit(field_type, selection.selection_set, field_rows, depth + 1)
+
+    def analyze(self):
+        """Compute the cost, raising QueryCostError when a limit is exceeded."""
+        if self.operation is None:
+            return self
+        for definition in self.operation.variable_definitions or ():
+            name = definition.variable.name.value
+            if self.variables.get(name) is None and definition.default_value is not None:
+                self.variables[name] = _value(definition.default_value, {})
+
+        root_type = {
+            "query": self.schema.get_query_type(),
+            "mutation": self.schema.get_mutation_type(),
+        }.get(self.operation.operation)
+        if root_type is None:
+            return self
+        self.visit(root_type, self.operation.selection_set, 1, 0)
+        if self.cost > self.options["MAX_COST"]:
+            raise QueryCostError(
+                f"Query cost {self.cost} exceeds the maximum of {self.options['MAX_COST']}"
+            )
+        return self
+
+    def as_extension(self):
+        return {
+            "requested": self.cost,
+            "maximum": self.options["MAX_COST"],
+            "depth": self.depth,
+        }
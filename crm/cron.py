@@ -1,7 +1,21 @@
 from datetime import datetime
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
-import requests
+
+from crm.executor import execute
+
+HELLO_QUERY = "{ hello }"
+
+UPDATE_LOW_STOCK_MUTATION = """
+    mutation {
+        updateLowStockProducts {
+            success
+            updatedProducts {
+                name
+                stock
+            }
+        }
+    }
+"""
+
 
 def log_crm_heartbeat():
     timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
@@ -11,41 +25,19 @@ def log_crm_heartbeat():
     with open("/tmp/crm_heartbeat_log.txt", "a") as f:
         f.write(log_message)
 
-    # Optional GraphQL check
+    # Optional GraphQL check, executed in-process against the schema
     try:
-        transport = RequestsHTTPTransport(
-            url="http://localhost:8000/graphql",
-            verify=False,
-            retries=3,
-        )
-        client = Client(transport=transport, fetch_schema_from_transport=True)
-        query = gql("{ hello }")
-        result = client.execute(query)
+        result = execute(HELLO_QUERY)
         print("GraphQL hello check:", result)
     except Exception as e:
         print("GraphQL check failed:", e)
+
+
 def update_low_stock():
     timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
 
     try:
-        transport = RequestsHTTPTransport(
-            url="http://localhost:8000/graphql",
-            verify=False,
-            retries=3,
-        )
-        client = Client(transport=transport, fetch_schema_from_transport=True)
-        mutation = gql("""
-            mutation {
-                updateLowStockProducts {
-                    success
-                    updatedProducts {
-                        name
-                        stock
-                    }
-                }
-            }
-        """)
-        result = client.execute(mutation)
+        result = execute(UPDATE_LOW_STOCK_MUTATION)
         updates = result["updateLowStockProducts"]["updatedProducts"]
         success_msg = result["updateLowStockProducts"]["success"]
 
@@ -56,4 +48,4 @@ def update_low_stock():
 
     except Exception as e:
         with open("/tmp/low_stock_updates_log.txt", "a") as f:
-            f.write(f"{timestamp} - Error: {str(e)}\n")
\ No newline at end of file
+            f.write(f"{timestamp} - Error: {str(e)}\n")
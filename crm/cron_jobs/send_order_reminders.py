@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 import datetime
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+import os
+import sys
+
+import django
+
+# Run inside the project so the query executes in-process against the ORM
+# rather than over HTTP against a running web server.
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crm.settings")
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from crm.services import send_order_reminders  # noqa: E402
 
 LOG_FILE = "/tmp/order_reminders_log.txt"
+WINDOW_DAYS = 7
 
 def log_message(message):
     """Append a message to the log file with a timestamp."""
@@ -11,41 +24,17 @@ def log_message(message):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log.write(f"{timestamp} - {message}\n")
 
-def main():
-    # Set up the GraphQL transport
-    transport = RequestsHTTPTransport(
-        url="http://localhost:8000/graphql",
-        verify=False,
-        retries=3,
-    )
-
-    client = Client(transport=transport, fetch_schema_from_transport=False)
-
-    # Build GraphQL query
-    query = gql("""
-    query {
-        orders {
-            id
-            orderDate
-            customer {
-                email
-            }
-        }
-    }
-    """)
+def remind(email, order_ids):
+    """Send one reminder per customer, covering all their pending orders."""
+    orders = ", ".join(str(pk) for pk in order_ids)
+    log_message(f"Order ID: {orders} - Email: {email}")
 
+def main():
     try:
-        result = client.execute(query)
-        now = datetime.datetime.now()
-        one_week_ago = now - datetime.timedelta(days=7)
-
-        for order in result.get("orders", []):
-            order_date = datetime.datetime.fromisoformat(order["orderDate"])
-            if one_week_ago <= order_date <= now:
-                customer_email = order["customer"]["email"]
-                log_message(f"Order ID: {order['id']} - Email: {customer_email}")
-
-        print("Order reminders processed!")
+        # Orders already reminded are skipped, so reruns only pick up new ones.
+        since = timezone.now() - datetime.timedelta(days=WINDOW_DAYS)
+        customers = send_order_reminders(since, remind)
+        print(f"Order reminders processed! ({customers} customers)")
 
     except Exception as e:
         log_message(f"Error processing order reminders: {str(e)}")
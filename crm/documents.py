@@ -0,0 +1,143 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import parse, validate
+from graphql.backend.base import GraphQLBackend, GraphQLDocument
+from graphql.execution import ExecutionResult, execute
+from graphql.language import ast
+from graphql.language.printer import print_ast
+
+DEFAULT_DOCUMENT_CACHE_SIZE = 512
+DEFAULT_PERSISTED_QUERY_TIMEOUT = 24 * 60 * 60
+PERSISTED_QUERY_PREFIX = "crm:apq:"
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+# ===== Parsed Document Cache =====
+class DocumentCache:
+    """Process-local LRU of parsed and validated documents, keyed by sha256.
+
+    Validation errors are cached too, so a bad query is not re-validated on
+    every retry. Queries a client registers for Automatic Persisted Queries
+    (hash and text sent together) are stored in the Django cache under
+    their hash for GRAPHQL_PERSISTED_QUERY_TIMEOUT seconds, which lets it
+    send just the hash to any worker; a client whose hash has expired
+    simply registers it again.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or getattr(
+            settings, "GRAPHQL_DOCUMENT_CACHE_SIZE", DEFAULT_DOCUMENT_CACHE_SIZE
+        )
+        self.persisted_timeout = getattr(
+            settings, "GRAPHQL_PERSISTED_QUERY_TIMEOUT", DEFAULT_PERSISTED_QUERY_TIMEOUT
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.persisted_hits = self.persisted_misses = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, schema, query, sha256=None):
+        """Return ``(document_ast, validation_errors)`` for ``query``."""
+        sha256 = sha256 or query_hash(query)
+        key = (schema, sha256)
+        entry = self._lookup(key)
+        if entry is None:
+            document_ast = parse(query)
+            entry = (document_ast, validate(schema, document_ast))
+            self._store(key, entry)
+        return entry
+
+    def register_persisted(self, schema, sha256, query):
+        """Store ``query`` under ``sha256`` for APQ lookups, if it is valid."""
+        _, errors = self.get(schema, query, sha256)
+        if not errors:
+            cache.set(PERSISTED_QUERY_PREFIX + sha256, query, self.persisted_timeout)
+
+    def get_persisted(self, sha256):
+        """Return the query text registered under ``sha256``, or None if unknown."""
+        query = cache.get(PERSISTED_QUERY_PREFIX + sha256)
+        with self._lock:
+            if query is None:
+                self.persisted_misses += 1
+            else:
+                self.persisted_hits += 1
+        return query
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "persisted_hits": self.persisted_hits,
+                "persisted_misses": self.persisted_misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self.persisted_hits = self.persisted_misses = 0
+
+
+document_cache = DocumentCache()
+
+
+def _invalid(errors, *args, **kwargs):
+    return ExecutionResult(errors=errors, invalid=True)
+
+
+def make_document(schema, document_string, entry, **execute_params):
+    document_ast, errors = entry
+    if errors:
+        run = partial(_invalid, errors)
+    else:
+        # Already validated when cached, so execute() directly.
+        run = partial(execute, schema, document_ast, **execute_params)
+    return GraphQLDocument(
+        schema=schema,
+        document_string=document_string,
+        document_ast=document_ast,
+        execute=run,
+    )
+
+
+# ===== Backend =====
+class CachedGraphQLBackend(GraphQLBackend):
+    """graphql-core backend that serves documents from ``document_cache``."""
+
+    def __init__(self, executor=None, documents=None):
+        self.execute_params = {"executor": executor}
+        self.cache = documents or document_cache
+
+    def document_from_string(self, schema, document_string):
+        if isinstance(document_string, ast.Document):
+            document_string = print_ast(document_string)
+        entry = self.cache.get(schema, document_string)
+        return make_document(schema, document_string, entry, **self.execute_params)
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from .documents import CachedGraphQLBackend
+
+# ===== In-Process GraphQL Execution =====
+# Background jobs (cron, Celery) run their GraphQL documents here, inside the
+# worker, instead of POSTing them back to the web tier: no HTTP hop, no
+# schema introspection and no dependency on the web server being up. Parsed
+# and validated documents come from the same cache the GraphQL view uses.
+
+
+class LocalExecutionError(Exception):
+    """Raised when a locally executed document returns GraphQL errors."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(str(error) for error in errors))
+
+
+backend = CachedGraphQLBackend()
+
+
+def get_schema():
+    # Imported lazily so this module can be imported before apps are ready.
+    from alx_backend_graphql.schema import schema
+    return schema
+
+
+def execute(query, variables=None, operation_name=None, context=None):
+    """Run ``query`` against the CRM schema and return its ``data``.
+
+    ``context`` stands in for the request; a fresh one per call keeps the
+    DataLoader caches scoped to a single job run.
+    """
+    document = backend.document_from_string(get_schema(), query)
+    result = document.execute(
+        context_value=context if context is not None else SimpleNamespace(),
+        variable_values=variables,
+        operation_name=operation_name,
+    )
+    if result.errors:
+        raise LocalExecutionError(result.errors)
+    return result.data
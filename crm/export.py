@@ -0,0 +1,121 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import CustomerFilter, OrderFilter, ProductFilter
+from .models import Customer, Order, OrderItem, Product
+
+# ===== Streaming Export =====
+# Rows are read with values_list().iterator(), so no model instance is
+# built and the database cursor is consumed chunk by chunk, then encoded
+# one line at a time. Memory stays flat however many rows are exported.
+# Orders carry their items, merged in from a second cursor sorted the same
+# way; in CSV they use the "product_id:quantity;..." form import_crm reads.
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ("ndjson", "csv")
+
+EXPORTS = {
+    "customers": (Customer, CustomerFilter, ("id", "name", "email", "phone", "created_at")),
+    "products": (Product, ProductFilter, ("id", "name", "price", "stock")),
+    "orders": (Order, OrderFilter, ("id", "customer_id", "order_date", "total_amount")),
+}
+
+
+def export_queryset(kind, params=None):
+    """Filtered queryset for ``kind``, using the same FilterSet as the GraphQL fields."""
+    model, filterset_class, _ = EXPORTS[kind]
+    filterset = filterset_class(data=params or {}, queryset=model.objects.all())
+    if not filterset.form.is_valid():
+        raise ValidationError(filterset.form.errors.as_json())
+    return filterset.qs.order_by("pk")
+
+
+def _order_items(orders, chunk_size):
+    """Yield ``(order_id, [items])`` in order id order, for ``orders``."""
+    rows = (
+        OrderItem.objects.filter(order__in=orders.values("pk"))
+        .order_by("order_id", "product_id")
+        .values_list("order_id", "product_id", "quantity", "unit_price")
+        .iterator(chunk_size=chunk_size)
+    )
+    current, items = None, []
+    for order_id, product_id, quantity, unit_price in rows:
+        if order_id != current and items:
+            yield current, items
+            items = []
+        current = order_id
+        items.append({"product_id": product_id, "quantity": quantity, "unit_price": unit_price})
+    if items:
+        yield current, items
+
+
+def export_rows(kind, queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one dict per row of ``queryset``."""
+    columns = EXPORTS[kind][2]
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    if kind != "orders":
+        for values in rows:
+            yield dict(zip(columns, values))
+        return
+
+    # Both cursors are sorted by order id, so items are merged in one pass.
+    items = _order_items(queryset, chunk_size)
+    pending = next(items, None)
+    for values in rows:
+        row = dict(zip(columns, values))
+        while pending is not None and pending[0] < row["id"]:
+            pending = next(items, None)
+        if pending is not None and pending[0] == row["id"]:
+            row["items"] = pending[1]
+            pending = next(items, None)
+        else:
+            row["items"] = []
+        yield row
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def encode_rows(kind, rows, fmt):
+    """Yield the export as text lines (with a header first for CSV)."""
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+        return
+
+    columns = EXPORTS[kind][2] + (("items",) if kind == "orders" else ())
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        if kind == "orders":
+            row["items"] = ";".join(f"{item['product_id']}:{item['quantity']}" for item in row["items"])
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in (row[column] for column in columns)
+        ])
+
+
+def buffered(lines, size=64 * 1024):
+    """Join lines into chunks of about ``size`` characters for fewer writes."""
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def stream_export(kind, params=None, fmt="ndjson", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Filter, read and encode an export; returns a generator of text chunks."""
+    queryset = export_queryset(kind, params)
+    return buffered(encode_rows(kind, export_rows(kind, queryset, chunk_size), fmt))
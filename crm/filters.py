@@ -1,10 +1,11 @@
 import django_filters
-from .models import Customer, Product, Order
+from .models import Customer, Product, Order, OrderItem
+from .search import filter_contains
 
 # ===== Customer Filter =====
 class CustomerFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
-    email = django_filters.CharFilter(field_name="email", lookup_expr="icontains")
+    name = django_filters.CharFilter(field_name="name", method="filter_contains")
+    email = django_filters.CharFilter(field_name="email", method="filter_contains")
     created_at__gte = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
     created_at__lte = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
     phone_pattern = django_filters.CharFilter(method="filter_phone_pattern")
@@ -13,13 +14,21 @@ class CustomerFilter(django_filters.FilterSet):
         model = Customer
         fields = ["name", "email", "created_at"]
 
+    def filter_contains(self, queryset, name, value):
+        return filter_contains(queryset, name, value)
+
     def filter_phone_pattern(self, queryset, name, value):
-        return queryset.filter(phone__startswith=value)
+        # A prefix is the half-open range [value, next prefix), which any
+        # B-tree index on phone can serve; LIKE 'value%' cannot on SQLite.
+        if not value:
+            return queryset
+        upper = value[:-1] + chr(ord(value[-1]) + 1)
+        return queryset.filter(phone__gte=value, phone__lt=upper)
 
 
 # ===== Product Filter =====
 class ProductFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
+    name = django_filters.CharFilter(field_name="name", method="filter_contains")
     price__gte = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
     price__lte = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
     stock__gte = django_filters.NumberFilter(field_name="stock", lookup_expr="gte")
@@ -29,6 +38,9 @@ class ProductFilter(django_filters.FilterSet):
         model = Product
         fields = ["name", "price", "stock"]
 
+    def filter_contains(self, queryset, name, value):
+        return filter_contains(queryset, name, value)
+
 
 # ===== Order Filter =====
 class OrderFilter(django_filters.FilterSet):
@@ -36,10 +48,19 @@ class OrderFilter(django_filters.FilterSet):
     total_amount__lte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="lte")
     order_date__gte = django_filters.DateFilter(field_name="order_date", lookup_expr="gte")
     order_date__lte = django_filters.DateFilter(field_name="order_date", lookup_expr="lte")
-    customer_name = django_filters.CharFilter(field_name="customer__name", lookup_expr="icontains")
-    product_name = django_filters.CharFilter(field_name="products__name", lookup_expr="icontains")
+    customer_name = django_filters.CharFilter(field_name="customer__name", method="filter_customer_name")
+    product_name = django_filters.CharFilter(field_name="products__name", method="filter_product_name")
     product_id = django_filters.NumberFilter(field_name="products__id", lookup_expr="exact")
 
     class Meta:
         model = Order
         fields = ["total_amount", "order_date", "customer_name", "product_name"]
+
+    def filter_customer_name(self, queryset, name, value):
+        return filter_contains(queryset, "customer__name", value)
+
+    def filter_product_name(self, queryset, name, value):
+        # Match through OrderItem so an order is returned once, however many
+        # of its products match.
+        items = filter_contains(OrderItem.objects.all(), "product__name", value)
+        return queryset.filter(pk__in=items.values("order_id"))
@@ -0,0 +1,147 @@
+import asyncio
+from collections import defaultdict
+
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from .aio import running_async
+from .models import Customer, Order, OrderItem, Product
+
+
+# ===== Batch Loaders =====
+# Every loader turns the keys requested during one tick of GraphQL execution
+# into a single SQL query, so nested selections cost one query per relation
+# per level instead of one per parent row. Under the async view the same
+# query runs through the async ORM and the batch resolves from a future.
+# Subclasses define get_rows(keys), the queryset fetching everything needed
+# for the keys, and group(rows, keys), mapping the rows back to one value
+# per key in key order.
+class CRMDataLoader(DataLoader):
+    # Keep `__in` lists well below SQLite's bound-variable limit.
+    max_batch_size = 500
+
+    def batch_load_fn(self, keys):
+        if running_async():
+            return Promise.resolve(asyncio.ensure_future(self.abatch_load(keys)))
+        return Promise.resolve(self.group(self.get_rows(keys), keys))
+
+    async def abatch_load(self, keys):
+        return self.group([row async for row in self.get_rows(keys)], keys)
+
+
+def _by_key(rows, key, keys):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[key(row)].append(row)
+    return [grouped[k] for k in keys]
+
+
+class CustomerLoader(CRMDataLoader):
+    """Customer by customer id (Order.customer)."""
+
+    def get_rows(self, keys):
+        return Customer.objects.filter(pk__in=keys)
+
+    def group(self, rows, keys):
+        customers = {customer.pk: customer for customer in rows}
+        return [customers.get(key) for key in keys]
+
+
+class ProductLoader(CRMDataLoader):
+    """Product by product id (OrderItem.product)."""
+
+    def get_rows(self, keys):
+        return Product.objects.filter(pk__in=keys)
+
+    def group(self, rows, keys):
+        products = {product.pk: product for product in rows}
+        return [products.get(key) for key in keys]
+
+
+class OrderItemsLoader(CRMDataLoader):
+    """Line items of each order, keyed by order id."""
+
+    def get_rows(self, keys):
+        return OrderItem.objects.filter(order_id__in=keys).order_by("id")
+
+    def group(self, rows, keys):
+        return _by_key(rows, lambda item: item.order_id, keys)
+
+
+class OrderProductsLoader(CRMDataLoader):
+    """Products of each order, keyed by order id via OrderItem."""
+
+    def get_rows(self, keys):
+        return (
+            OrderItem.objects.filter(order_id__in=keys)
+            .select_related("product")
+            .order_by("id")
+        )
+
+    def group(self, rows, keys):
+        products = defaultdict(list)
+        for row in rows:
+            products[row.order_id].append(row.product)
+        return [products[key] for key in keys]
+
+
+class CustomerOrdersLoader(CRMDataLoader):
+    """Orders placed by each customer, keyed by customer id."""
+
+    def get_rows(self, keys):
+        return Order.objects.filter(customer_id__in=keys).order_by("id")
+
+    def group(self, rows, keys):
+        return _by_key(rows, lambda order: order.customer_id, keys)
+
+
+class ProductOrdersLoader(CRMDataLoader):
+    """Orders containing each product, keyed by product id via OrderItem."""
+
+    def get_rows(self, keys):
+        return (
+            OrderItem.objects.filter(product_id__in=keys)
+            .select_related("order")
+            .order_by("order_id")
+        )
+
+    def group(self, rows, keys):
+        orders = defaultdict(list)
+        for row in rows:
+            orders[row.product_id].append(row.order)
+        return [orders[key] for key in keys]
+
+
+class Loaders:
+    def __init__(self):
+        self.customer = CustomerLoader()
+        self.product = ProductLoader()
+        self.order_items = OrderItemsLoader()
+        self.order_products = OrderProductsLoader()
+        self.customer_orders = CustomerOrdersLoader()
+        self.product_orders = ProductOrdersLoader()
+
+
+def prefetched(instance, name):
+    """Return ``instance.<name>`` as a list if the query planner already prefetched it."""
+    cache = getattr(instance, "_prefetched_objects_cache", {})
+    if name in cache:
+        return list(cache[name])
+    return None
+
+
+def get_loaders(info):
+    """Return the loaders for the current request, creating them on first use.
+
+    Loaders are stored on the request (``info.context``) so their caches never
+    outlive a single GraphQL request. Without a context every call gets a
+    fresh set, which is still correct but cannot batch across fields.
+    """
+    context = info.context
+    if context is None:
+        return Loaders()
+    loaders = getattr(context, "crm_loaders", None)
+    if loaders is None:
+        loaders = Loaders()
+        context.crm_loaders = loaders
+    return loaders
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crm.models import Customer
+from crm.services import PHONE_RE, bulk_create_customers
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_rows(size, duplicates=0.01):
+    """Customer rows with a small share of intra-batch duplicate emails."""
+    every = int(1 / duplicates) if duplicates else 0
+    rows = []
+    for i in range(size):
+        n = i - 1 if every and i and i % every == 0 else i
+        rows.append({
+            "name": f"Bench Customer {n}",
+            "email": f"bench-{n}@example.com",
+            "phone": f"+1555{n:07d}",
+        })
+    return rows
+
+
+def legacy_bulk_create(rows):
+    """The previous per-row path: one exists() and one INSERT per row."""
+    customers, errors = [], []
+    for row in rows:
+        if Customer.objects.filter(email=row["email"]).exists():
+            errors.append(f"Email already exists: {row['email']}")
+            continue
+        if row["phone"] and not PHONE_RE.match(row["phone"]):
+            errors.append(f"Invalid phone format: {row['phone']}")
+            continue
+        customers.append(Customer.objects.create(**row))
+    return customers, errors
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulkCreateCustomers throughput (rows/sec). All writes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000")
+        parser.add_argument(
+            "--legacy", action="store_true",
+            help="Also time the old per-row exists()/create() path.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        paths = [("bulk", bulk_create_customers)]
+        if options["legacy"]:
+            paths.append(("legacy", legacy_bulk_create))
+
+        for size in sizes:
+            rows = make_rows(size)
+            for label, create in paths:
+                try:
+                    with transaction.atomic():
+                        start = time.perf_counter()
+                        customers, errors = create(rows)
+                        elapsed = time.perf_counter() - start
+                        raise Rollback
+                except Rollback:
+                    pass
+                self.stdout.write(
+                    f"{label:>6} {size:>7} rows: {elapsed:8.3f}s "
+                    f"{size / elapsed:>10.0f} rows/sec "
+                    f"({len(customers)} created, {len(errors)} errors)"
+                )
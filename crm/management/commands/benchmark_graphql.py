@@ -0,0 +1,279 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from types import SimpleNamespace
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from crm.executor import backend, get_schema
+from crm.models import Customer, Order, OrderItem, Product
+from crm.tracing import quantile
+
+# ===== Benchmark Corpus =====
+# A fixed set of operations covering the main read paths (pagination,
+# filters, nested lists, keyset pages, aggregates) and the mutations.
+# Variables are built from the data in the database, so the same corpus
+# runs on any dataset; generate_load_data makes one reproducible.
+# Mutations run inside a transaction that is rolled back every time.
+
+CORPUS = [
+    {
+        "name": "customers_page",
+        "query": "query { allCustomers(first: 50) { totalCount edges { node { id name email phone } } } }",
+    },
+    {
+        "name": "customers_search",
+        "query": 'query { allCustomers(first: 20, name: "ali") { edges { node { id name email } } } }',
+    },
+    {
+        "name": "products_filtered",
+        "query": 'query { allProducts(first: 50, price_Gte: "100", stock_Gte: "1") { edges { node { id name price stock } } } }',
+    },
+    {
+        "name": "orders_nested",
+        "query": (
+            "query { allOrders(first: 50) { edges { node { id orderDate totalAmount "
+            "customer { name email } items { quantity unitPrice product { name price } } } } } }"
+        ),
+    },
+    {
+        "name": "orders_keyset",
+        "query": (
+            "query { allOrdersKeyset(first: 100) { pageInfo { hasNextPage endCursor } "
+            "edges { node { id totalAmount customer { name } } } } }"
+        ),
+    },
+    {
+        "name": "recent_orders",
+        "query": (
+            "query($since: DateTime!) { recentOrders(since: $since, first: 100) "
+            "{ edges { node { id orderDate customer { email } } } } }"
+        ),
+        "variables": lambda fixture: {"since": fixture["week_ago"]},
+    },
+    {
+        "name": "stats_week",
+        "query": (
+            "query { crmStats(groupBy: WEEK) { customerCount orderCount revenue averageOrderValue "
+            "groups { key orderCount revenue } } }"
+        ),
+    },
+    {
+        "name": "stats_product",
+        "query": "query { crmStats(groupBy: PRODUCT) { groups { productId units revenue } } }",
+    },
+    {
+        "name": "rollup_month",
+        "query": "query { salesRollup(groupBy: MONTH) { period units revenue orderCount } }",
+    },
+    {
+        "name": "rollup_product",
+        "query": "query { salesRollup(groupBy: PRODUCT) { productId productName units revenue } }",
+    },
+    {
+        "name": "create_order",
+        "mutation": True,
+        "query": (
+            "mutation($customer: ID!, $product: ID!, $other: ID!) { createOrder(input: "
+            "{customerId: $customer, items: [{productId: $product, quantity: 2}, {productId: $other}]}) "
+            "{ order { id totalAmount } } }"
+        ),
+        "variables": lambda fixture: {
+            "customer": fixture["customer"], "product": fixture["products"][0], "other": fixture["products"][1],
+        },
+    },
+    {
+        "name": "bulk_create_customers",
+        "mutation": True,
+        "query": (
+            "mutation($input: [CustomerInput]!) { bulkCreateCustomers(input: $input) "
+            "{ customers { id } errors } }"
+        ),
+        "variables": lambda fixture: {"input": [
+            {"name": f"Benchmark {i}", "email": f"benchmark-{i}@example.com"} for i in range(50)
+        ]},
+    },
+    {
+        "name": "restock_low_stock",
+        "mutation": True,
+        "query": "mutation { updateLowStockProducts(threshold: 10, amount: 10) { success } }",
+    },
+]
+
+
+def load_fixture():
+    """Ids and dates the corpus variables are built from."""
+    customer = Customer.objects.order_by("pk").values_list("pk", flat=True).first()
+    products = list(Product.objects.filter(stock__gte=5).order_by("pk").values_list("pk", flat=True)[:2])
+    if customer is None or len(products) < 2:
+        raise CommandError("Not enough data to benchmark; run generate_load_data first.")
+    return {
+        "customer": str(customer),
+        "products": [str(pk) for pk in products],
+        "week_ago": (timezone.now() - timedelta(days=7)).isoformat(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Benchmark:
+    """Runs one corpus entry through the schema, as the GraphQL view would."""
+
+    def __init__(self, case, fixture):
+        self.name = case["name"]
+        self.mutation = case.get("mutation", False)
+        self.variables = case["variables"](fixture) if "variables" in case else None
+        self.document = backend.document_from_string(get_schema(), case["query"])
+
+    def run(self):
+        # A fresh context per run, like one per request, so DataLoader
+        # caches never carry over between iterations.
+        if not self.mutation:
+            return self.execute()
+        with transaction.atomic():
+            result = self.execute()
+            transaction.set_rollback(True)
+        return result
+
+    def execute(self):
+        result = self.document.execute(context_value=SimpleNamespace(), variable_values=self.variables)
+        if result.errors:
+            raise CommandError(f"{self.name}: {'; '.join(str(error) for error in result.errors)}")
+        return result
+
+    def measure(self, iterations, warmup):
+        for _ in range(warmup):
+            self.run()
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            self.run()
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.run()
+
+        # Traced separately: tracemalloc slows down every allocation.
+        tracemalloc.start()
+        try:
+            self.run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "p50_ms": quantile(latencies, 0.5) * 1000,
+            "p95_ms": quantile(latencies, 0.95) * 1000,
+            "p99_ms": quantile(latencies, 0.99) * 1000,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "queries": len(queries),
+            "peak_kib": peak / 1024,
+        }
+
+
+def compare(baseline, results, threshold):
+    """Yield ``(name, metric, old, new)`` for every regression beyond ``threshold``.
+
+    Latency and memory regress when they grow by more than ``threshold``
+    (a fraction); the SQL query count regresses when it grows at all.
+    """
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if new["queries"] > old["queries"]:
+            yield name, "queries", old["queries"], new["queries"]
+        for metric in ("p50_ms", "p95_ms", "peak_kib"):
+            if new[metric] > old[metric] * (1 + threshold):
+                yield name, metric, old[metric], new[metric]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a fixed corpus of GraphQL queries and mutations through the "
+        "schema and report latency percentiles, SQL query counts and peak "
+        "memory; save the results as JSON and compare them with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--only", action="append", metavar="NAME", help="Run only this corpus entry (repeatable).")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare with.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Relative latency/memory growth reported as a regression (default 0.2 = 20%%).",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        cases = CORPUS
+        if options["only"]:
+            unknown = set(options["only"]) - {case["name"] for case in CORPUS}
+            if unknown:
+                raise CommandError(f"Unknown corpus entries: {', '.join(sorted(unknown))}")
+            cases = [case for case in CORPUS if case["name"] in options["only"]]
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as handle:
+                baseline = json.load(handle)["results"]
+
+        fixture = load_fixture()
+        results = {}
+        self.stdout.write(
+            f"{'operation':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'queries':>9}{'peak KiB':>10}"
+        )
+        for case in cases:
+            stats = Benchmark(case, fixture).measure(options["iterations"], options["warmup"])
+            results[case["name"]] = stats
+            self.stdout.write(
+                f"{case['name']:<24}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                f"{stats['mean_ms']:>10.2f}{stats['queries']:>9}{stats['peak_kib']:>10.1f}"
+            )
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "commit": git_commit(),
+                    "timestamp": timezone.now().isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "database": connection.vendor,
+                    "iterations": options["iterations"],
+                    "rows": {
+                        model.__name__: model.objects.count()
+                        for model in (Customer, Product, Order, OrderItem)
+                    },
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = list(compare(baseline, results, options["threshold"]))
+            for name, metric, old, new in regressions:
+                self.stdout.write(self.style.WARNING(f"{name}: {metric} {old:.2f} -> {new:.2f}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
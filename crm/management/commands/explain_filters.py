@@ -0,0 +1,128 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from crm.filters import CustomerFilter, OrderFilter, ProductFilter
+from crm.models import Customer, Order, Product
+
+SURNAMES = ["Johnson", "Smith", "Okafor", "Mensah", "Garcia", "Nguyen", "Kowalski", "Haddad"]
+PRODUCTS = ["Laptop", "Phone", "Headphones", "Monitor", "Keyboard", "Mouse", "Tablet", "Camera"]
+
+
+def seed(rows, batch_size=10000):
+    """Bulk-insert ``rows`` customers and orders and rows/10 products."""
+    rng = random.Random(42)
+    now = timezone.now()
+    with transaction.atomic():
+        for start in range(0, rows // 10, batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    name=f"{rng.choice(PRODUCTS)} {i}",
+                    price=Decimal(rng.randint(100, 200000)) / 100,
+                    stock=rng.randint(0, 500),
+                )
+                for i in range(start, min(start + batch_size, rows // 10))
+            ])
+        for start in range(0, rows, batch_size):
+            Customer.objects.bulk_create([
+                Customer(
+                    name=f"Customer {i} {rng.choice(SURNAMES)}",
+                    email=f"seed-{i}@example.com",
+                    phone=f"+1{rng.randint(200, 999)}{i:07d}",
+                    created_at=now - timedelta(days=rng.randint(0, 1500)),
+                )
+                for i in range(start, min(start + batch_size, rows))
+            ])
+        first_customer = Customer.objects.order_by("pk").values_list("pk", flat=True).first()
+        for start in range(0, rows, batch_size):
+            Order.objects.bulk_create([
+                Order(
+                    customer_id=first_customer + rng.randrange(rows),
+                    total_amount=Decimal(rng.randint(100, 500000)) / 100,
+                    order_date=now - timedelta(minutes=rng.randint(0, 60 * 24 * 730)),
+                )
+                for _ in range(start, min(start + batch_size, rows))
+            ])
+
+
+def cases():
+    """(label, queryset before this change, queryset through the filtersets)."""
+    cutoff = timezone.now() - timedelta(days=365)
+    recent = Order.objects.filter(customer=OuterRef("pk"), order_date__gte=cutoff)
+    return [
+        ("customer name icontains",
+         Customer.objects.filter(name__icontains="johnson"),
+         CustomerFilter({"name": "johnson"}, Customer.objects.all()).qs),
+        ("customer email icontains",
+         Customer.objects.filter(email__icontains="seed-4242"),
+         CustomerFilter({"email": "seed-4242"}, Customer.objects.all()).qs),
+        ("customer phone prefix",
+         Customer.objects.filter(phone__startswith="+1555"),
+         CustomerFilter({"phone_pattern": "+1555"}, Customer.objects.all()).qs),
+        ("customer created_at range",
+         None,
+         CustomerFilter({"created_at__gte": (timezone.now() - timedelta(days=7)).date()},
+                        Customer.objects.all()).qs),
+        ("product name icontains",
+         Product.objects.filter(name__icontains="camera"),
+         ProductFilter({"name": "camera"}, Product.objects.all()).qs),
+        ("product price range",
+         None,
+         ProductFilter({"price__gte": 1990, "price__lte": 2000}, Product.objects.all()).qs),
+        ("product stock range",
+         None,
+         ProductFilter({"stock__lte": 3}, Product.objects.all()).qs),
+        ("order total range",
+         None,
+         OrderFilter({"total_amount__gte": 4990}, Order.objects.all()).qs),
+        ("order date range",
+         None,
+         OrderFilter({"order_date__gte": (timezone.now() - timedelta(days=2)).date()},
+                     Order.objects.all()).qs),
+        ("order customer name",
+         Order.objects.filter(customer__name__icontains="okafor"),
+         OrderFilter({"customer_name": "okafor"}, Order.objects.all()).qs),
+        ("inactive customers (customer_id, order_date)",
+         None,
+         Customer.objects.filter(~Exists(recent))),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plan and timing of every crm/filters.py filter, next "
+        "to the plain icontains/startswith lookup it replaces where relevant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="First bulk-insert this many customers and orders (e.g. 1000000).",
+        )
+
+    def timed(self, queryset):
+        start = time.perf_counter()
+        count = queryset.count()
+        return count, (time.perf_counter() - start) * 1000
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            start = time.perf_counter()
+            seed(options["seed"])
+            self.stdout.write(f"Seeded {options['seed']} rows in {time.perf_counter() - start:.1f}s")
+
+        for label, before, after in cases():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, queryset in (("before", before), ("after", after)):
+                if queryset is None:
+                    continue
+                count, ms = self.timed(queryset)
+                self.stdout.write(f"  {name}: {count} rows in {ms:.1f} ms")
+                for line in queryset.explain().splitlines():
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,165 @@
+import math
+import random
+import time
+from bisect import bisect
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from crm.models import Customer, Order, OrderItem, Product
+from crm.response_cache import invalidate
+from crm.services import QUERY_CHUNK_SIZE, rebuild_sales_rollup
+
+FIRST_NAMES = ["Ama", "Kwame", "Maria", "Chen", "Fatima", "Lukas", "Aisha", "Diego", "Yuki", "Noah"]
+SURNAMES = ["Johnson", "Smith", "Okafor", "Mensah", "Garcia", "Nguyen", "Kowalski", "Haddad"]
+CATEGORIES = ["Laptop", "Phone", "Headphones", "Monitor", "Keyboard", "Mouse", "Tablet", "Camera"]
+ADJECTIVES = ["Pro", "Air", "Mini", "Max", "Lite", "Plus", "Ultra", "Studio"]
+
+
+def zipf_weights(count, exponent):
+    """Cumulative weights of ranks 1..count under Zipf's law (rank**-exponent)."""
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def seasonal_weights(days, end):
+    """Cumulative weights of the ``days`` days before ``end``.
+
+    Demand grows over the period, peaks in late November and December,
+    dips in mid-summer and is higher on weekends.
+    """
+    weights = []
+    for offset in range(days):
+        day = end - timedelta(days=days - 1 - offset)
+        yearly = 1 + 0.25 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365)
+        holiday = 1.8 if (day.month == 11 and day.day >= 20) or day.month == 12 else 1.0
+        weekend = 1.3 if day.weekday() >= 5 else 1.0
+        growth = 0.6 + 0.4 * offset / max(days - 1, 1)
+        weights.append(yearly * holiday * weekend * growth)
+    return list(accumulate(weights))
+
+
+def pick(rng, cum_weights):
+    """Index drawn from cumulative weights (random.choices without the list)."""
+    return bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate reproducible load-test data: customers, products and "
+        "orders with Zipf-distributed product and customer popularity, "
+        "seasonal order dates and 1-5 line items per order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=10000)
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=100000)
+        parser.add_argument("--days", type=int, default=730, help="Spread orders over this many days.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of product popularity.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = f"load-{options['seed']}"
+        if Customer.objects.filter(email__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Data for --seed {options['seed']} already exists; use another seed.")
+        batch_size = options["batch_size"]
+        start = time.perf_counter()
+
+        product_ids, prices = self.generate_products(rng, options["products"], batch_size)
+        customer_ids = self.generate_customers(rng, prefix, options["customers"], batch_size)
+        self.stdout.write(
+            f"{len(customer_ids)} customers, {len(product_ids)} products "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        # Popularity ranks are shuffled so they do not follow primary keys.
+        rng.shuffle(product_ids)
+        rng.shuffle(customer_ids)
+        product_weights = zipf_weights(len(product_ids), options["zipf"])
+        customer_weights = zipf_weights(len(customer_ids), 0.8)
+        end = timezone.now()
+        day_weights = seasonal_weights(options["days"], end.date())
+
+        orders_start = time.perf_counter()
+        dates = set()
+        created = 0
+        while created < options["orders"]:
+            size = min(batch_size, options["orders"] - created)
+            orders, lines = [], []
+            for _ in range(size):
+                order_lines = {}
+                for _ in range(rng.choice((1, 1, 1, 2, 2, 3, 4, 5))):
+                    pk = product_ids[pick(rng, product_weights)]
+                    order_lines[pk] = order_lines.get(pk, 0) + rng.choice((1, 1, 1, 2, 3))
+                day = options["days"] - 1 - pick(rng, day_weights)
+                order_date = end - timedelta(days=day, seconds=rng.randrange(86400))
+                orders.append(Order(
+                    customer_id=customer_ids[pick(rng, customer_weights)],
+                    order_date=order_date,
+                    total_amount=sum(prices[pk] * quantity for pk, quantity in order_lines.items()),
+                ))
+                lines.append(order_lines)
+                dates.add(timezone.localdate(order_date))
+
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders, batch_size=QUERY_CHUNK_SIZE)
+                OrderItem.objects.bulk_create(
+                    [
+                        OrderItem(order_id=order.pk, product_id=pk, quantity=quantity, unit_price=prices[pk])
+                        for order, order_lines in zip(orders, lines)
+                        for pk, quantity in order_lines.items()
+                    ],
+                    batch_size=QUERY_CHUNK_SIZE,
+                )
+            created += size
+            elapsed = time.perf_counter() - orders_start
+            self.stdout.write(f"{created} orders ({created / elapsed:.0f} orders/sec)")
+
+        rollup_start = time.perf_counter()
+        rebuild_sales_rollup(dates)
+        invalidate(Customer, Product, Order, OrderItem)
+        self.stdout.write(f"Sales rollup for {len(dates)} days in {time.perf_counter() - rollup_start:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Generated in {time.perf_counter() - start:.1f}s"))
+
+    def generate_products(self, rng, count, batch_size):
+        product_ids, prices = [], {}
+        for start in range(0, count, batch_size):
+            products = []
+            for i in range(start, min(start + batch_size, count)):
+                # Log-uniform prices: many cheap accessories, few expensive devices.
+                price = Decimal(round(math.exp(rng.uniform(math.log(5), math.log(3000))), 2)).quantize(Decimal("0.01"))
+                products.append(Product(
+                    name=f"{rng.choice(CATEGORIES)} {rng.choice(ADJECTIVES)} {i}",
+                    price=price,
+                    stock=rng.randint(0, 500),
+                ))
+            with transaction.atomic():
+                for product in Product.objects.bulk_create(products, batch_size=QUERY_CHUNK_SIZE):
+                    product_ids.append(product.pk)
+                    prices[product.pk] = product.price
+        return product_ids, prices
+
+    def generate_customers(self, rng, prefix, count, batch_size):
+        customer_ids = []
+        now = timezone.now()
+        for start in range(0, count, batch_size):
+            customers = [
+                Customer(
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+                    email=f"{prefix}-{i}@example.com",
+                    phone=f"+1{rng.randint(200, 999)}{i % 10 ** 7:07d}" if rng.random() < 0.7 else None,
+                    created_at=now - timedelta(days=rng.randint(0, 1500)),
+                )
+                for i in range(start, min(start + batch_size, count))
+            ]
+            with transaction.atomic():
+                customer_ids.extend(
+                    customer.pk for customer in Customer.objects.bulk_create(customers, batch_size=QUERY_CHUNK_SIZE)
+                )
+        return customer_ids
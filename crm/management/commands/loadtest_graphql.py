@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.tracing import quantile
+
+DEFAULT_QUERY = (
+    "query LoadTest { allOrders(first: 10) { edges { node { id totalAmount "
+    "customer { name } items { quantity product { name } } } } } }"
+)
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns ``(status, keep_alive)``."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection", "").lower() != "close"
+
+
+class LoadTest:
+    """Closed-loop HTTP load: ``concurrency`` keep-alive connections POSTing one query."""
+
+    def __init__(self, url, query, concurrency, requests):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise CommandError("Only http:// URLs are supported.")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        body = json.dumps({"query": query}).encode("utf-8")
+        self.payload = (
+            f"POST {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode("latin-1") + body
+        self.concurrency = concurrency
+        self.remaining = requests
+        self.latencies = []
+        self.statuses = {}
+        self.failures = 0
+
+    async def worker(self):
+        reader = writer = None
+        while self.remaining > 0:
+            self.remaining -= 1
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                writer.write(self.payload)
+                await writer.drain()
+                status, keep_alive = await read_response(reader)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                self.failures += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            self.latencies.append(time.perf_counter() - start)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def run(self):
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker() for _ in range(self.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        return self
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running GraphQL endpoint (e.g. /graphql under gunicorn "
+        "against /graphql/async under uvicorn) and report throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/graphql/async")
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument("--query", default=DEFAULT_QUERY)
+
+    def handle(self, *args, **options):
+        test = LoadTest(
+            options["url"], options["query"], options["concurrency"], options["requests"]
+        )
+        asyncio.run(test.run())
+
+        latencies = sorted(test.latencies)
+        completed = len(latencies)
+        self.stdout.write(
+            f"{options['url']}: {completed} requests in {test.elapsed:.2f}s "
+            f"at concurrency {options['concurrency']}"
+        )
+        self.stdout.write(f"  throughput: {completed / test.elapsed:10.1f} req/s")
+        for q in (0.5, 0.95, 0.99):
+            self.stdout.write(f"  p{int(q * 100):<3}      {quantile(latencies, q) * 1000:10.1f} ms")
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(test.statuses.items()))
+        self.stdout.write(f"  statuses:   {statuses or '-'}; connection failures: {test.failures}")
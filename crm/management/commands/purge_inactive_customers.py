@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from crm.services import QUERY_CHUNK_SIZE, count_inactive_customers, purge_inactive_customers
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete customers with no order in the last --days days, with their "
+        "orders, in id-range chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--chunk-size", type=int, default=QUERY_CHUNK_SIZE)
+        parser.add_argument(
+            "--sleep", type=float, default=0.1,
+            help="Seconds to pause between chunks so other writers get the lock.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only count what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        if options["dry_run"]:
+            counts = count_inactive_customers(cutoff)
+            self.stdout.write(
+                f"Would delete {counts['customers']} customers, {counts['orders']} orders "
+                f"and {counts['items']} order items (no order since {cutoff:%Y-%m-%d})"
+            )
+            return
+
+        totals = {"customers": 0, "orders": 0, "items": 0}
+        start = time.perf_counter()
+        paused = 0.0
+        for number, deleted in enumerate(purge_inactive_customers(cutoff, options["chunk_size"]), 1):
+            for key, count in deleted.items():
+                totals[key] += count
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"chunk {number}: {deleted['customers']} customers, "
+                    f"{deleted['orders']} orders, {deleted['items']} items"
+                )
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+                paused += options["sleep"]
+
+        working = max(time.perf_counter() - start - paused, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {totals['customers']} customers, {totals['orders']} orders and "
+            f"{totals['items']} order items in {working:.2f}s "
+            f"({totals['customers'] / working:.0f} customers/sec, excluding pauses)"
+        ))
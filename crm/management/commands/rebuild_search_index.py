@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from crm.search import install_search_indexes, install_trigram_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Create any missing full-text and trigram search indexes and rebuild "
+        "them from the customer and product tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with connections[options["database"]].schema_editor() as schema_editor:
+            install_search_indexes(schema_editor)
+            install_trigram_indexes(schema_editor)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt search indexes in {time.perf_counter() - start:.2f}s"
+        ))
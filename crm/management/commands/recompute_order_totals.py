@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from crm.services import recompute_order_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute every Order.total_amount from its products in a single UPDATE."
+
+    def handle(self, *args, **options):
+        updated = recompute_order_totals()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed totals for {updated} orders"))
@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_unit_prices(apps, schema_editor):
+    """Existing lines were never priced; snapshot each product's current price."""
+    OrderItem = apps.get_model("crm", "OrderItem")
+    Product = apps.get_model("crm", "Product")
+    OrderItem.objects.update(unit_price=models.Subquery(
+        Product.objects.filter(pk=models.OuterRef("product_id")).values("price")[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_customer_created_at'),
+    ]
+
+    operations = [
+        # Adopt the auto-created crm_order_products table as the OrderItem
+        # through model without touching the rows it already holds.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='OrderItem',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='crm.order')),
+                        ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crm.product')),
+                    ],
+                    options={
+                        'db_table': 'crm_order_products',
+                        'unique_together': {('order', 'product')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='products',
+                    field=models.ManyToManyField(related_name='orders', through='crm.OrderItem', to='crm.product'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_unit_prices, migrations.RunPython.noop),
+        migrations.AlterModelTable(
+            name='orderitem',
+            table=None,
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def mark_order_dates_dirty(apps, schema_editor):
+    # The reconcile task builds the rollup for existing orders.
+    Order = apps.get_model("crm", "Order")
+    DirtySalesDate = apps.get_model("crm", "DirtySalesDate")
+    days = (
+        Order.objects.using(schema_editor.connection.alias)
+        .annotate(day=TruncDate("order_date"))
+        .order_by().values_list("day", flat=True).distinct()
+    )
+    DirtySalesDate.objects.using(schema_editor.connection.alias).bulk_create(
+        [DirtySalesDate(date=day) for day in days], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_order_reminder_sent_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtySalesDate',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crm.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='crm_rollup_date_product_uniq'), models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('date',), name='crm_rollup_date_total_uniq')],
+            },
+        ),
+        migrations.RunPython(mark_order_dates_dirty, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# The index SQL is copied here rather than imported from crm/search.py, so
+# later changes to that module cannot alter this migration.
+SEARCH_INDEXES = [
+    ("crm_customer", ("name", "email")),
+    ("crm_product", ("name",)),
+]
+
+
+def sqlite_sql(table, columns):
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"INSERT INTO {fts}({fts}) VALUES ('optimize')",
+    ]
+
+
+def postgres_vector(columns):
+    return " || ".join(
+        f"setweight(to_tsvector('simple'::regconfig, "
+        f"translate(coalesce({column}, ''), '@.-_+', '     ')), '{weight}')"
+        for column, weight in zip(columns, "ABCD")
+    )
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_INDEXES:
+        if vendor == "sqlite":
+            for sql in sqlite_sql(table, columns):
+                schema_editor.execute(sql)
+        elif vendor == "postgresql":
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_fts "
+                f"ON {table} USING gin (({postgres_vector(columns)}))"
+            )
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, _ in SEARCH_INDEXES:
+        fts = f"{table}_fts"
+        if vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {fts}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0007_daily_sales_rollup'),
+    ]
+
+    operations = [
+        # FTS5 unicode61 tables on SQLite, tsvector GIN indexes on Postgres.
+        migrations.RunPython(forwards, backwards),
+    ]
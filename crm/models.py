@@ -8,6 +8,12 @@ class Customer(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="crm_customer_created_idx"),
+            models.Index(fields=["phone"], name="crm_customer_phone_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -17,27 +23,92 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["price"], name="crm_product_price_idx"),
+            models.Index(fields=["stock"], name="crm_product_stock_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="orders")
-    products = models.ManyToManyField(Product, related_name="orders")
+    products = models.ManyToManyField(Product, through="OrderItem", related_name="orders")
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     order_date = models.DateTimeField(default=timezone.now)
+    # Set once the customer has been reminded about this order.
+    reminder_sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order_date"], name="crm_order_date_idx"),
+            models.Index(fields=["total_amount"], name="crm_order_total_idx"),
+            # Per-customer date scans: inactive-customer cleanup and reminders.
+            models.Index(fields=["customer", "order_date"], name="crm_order_customer_date_idx"),
+            # Only orders still waiting for a reminder, so the index stays small.
+            models.Index(
+                fields=["order_date"],
+                condition=models.Q(reminder_sent_at__isnull=True),
+                name="crm_order_pending_reminder_idx",
+            ),
+        ]
 
-    def save(self, *args, **kwargs):
-        # Save the order first to ensure it has an ID
-        super().save(*args, **kwargs)
+    def __str__(self):
+        return f"Order #{self.id} - {self.customer.name}"
 
-        # Calculate the total amount from related products
-        total = sum(p.price for p in self.products.all())
 
-        # Update only if total has changed to avoid infinite recursion
-        if self.total_amount != total:
-            self.total_amount = total
-            super().save(update_fields=['total_amount'])
+class OrderItem(models.Model):
+    """One product line of an order, with the price it was sold at."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    # Protected: deleting a product must not rewrite the orders it was sold in.
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="+")
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ("order", "product")
+
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
 
     def __str__(self):
-        return f"Order #{self.id} - {self.customer.name}"
+        return f"{self.quantity} x {self.product_id} @ {self.unit_price}"
+
+
+class DailySalesRollup(models.Model):
+    """Sales of one product on one day; the row with no product is the day's total.
+
+    Order creation adds to these rows in the same transaction (crm.services
+    add_to_sales_rollup); other writes mark the day in DirtySalesDate and
+    the reconcile task rebuilds it from the order items.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"], name="crm_rollup_date_product_uniq"),
+            models.UniqueConstraint(
+                fields=["date"],
+                condition=models.Q(product__isnull=True),
+                name="crm_rollup_date_total_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id or 'total'}: {self.units} units, {self.revenue}"
+
+
+class DirtySalesDate(models.Model):
+    """A day whose DailySalesRollup rows must be rebuilt."""
+    date = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return str(self.date)
@@ -0,0 +1,223 @@
+import base64
+import json
+from collections import OrderedDict
+
+import graphene
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q, QuerySet
+from graphene.relay import PageInfo
+from graphene.types.argument import to_arguments
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql_relay.connection.arrayconnection import (
+    connection_from_list_slice, cursor_to_offset, get_offset_with_default, offset_to_cursor,
+)
+
+from .aio import running_async
+
+
+DEFAULT_PAGE_SIZE = 100
+
+
+# ===== Connections =====
+class CountableConnection(graphene.relay.Connection):
+    """Relay connection with a totalCount that is only counted when selected."""
+
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+
+    def resolve_total_count(self, info):
+        # Offset connections have already counted; keyset ones count on demand.
+        if getattr(self, "length", None) is not None:
+            return self.length
+        if running_async():
+            return self.iterable.acount()
+        return self.iterable.count()
+
+
+def check_page_args(args):
+    """Reject negative page arguments, which slicing would misread."""
+    for name in ("first", "last", "offset"):
+        value = args.get(name)
+        if value is not None and value < 0:
+            raise Exception(f"{name} must not be negative")
+
+
+# ===== Async Evaluation =====
+class AsyncConnectionMixin:
+    """Evaluate a connection's queryset with the async ORM under the async view.
+
+    Mirrors DjangoConnectionField.resolve_connection (offset, first/last,
+    before/after, max_limit) but counts with ``acount()`` and fetches only
+    the requested window with ``async for``; the resolver returns a
+    coroutine, which the asyncio executor awaits.
+    """
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        check_page_args(args)
+        iterable = maybe_queryset(iterable)
+        if running_async() and isinstance(iterable, QuerySet):
+            return cls.aresolve_connection(connection, args, iterable, max_limit)
+        return super().resolve_connection(connection, args, iterable, max_limit)
+
+    @classmethod
+    async def aresolve_connection(cls, connection, args, queryset, max_limit=None):
+        offset = args.pop("offset", None)
+        after = args.get("after")
+        if offset:
+            if after:
+                offset += cursor_to_offset(after) + 1
+            args["after"] = offset_to_cursor(offset - 1)
+
+        list_length = await queryset.acount()
+        if max_limit is not None and "first" not in args:
+            args["first"] = list_length if "last" in args else max_limit
+
+        start = min(get_offset_with_default(args.get("after"), -1) + 1, list_length)
+        end = min(get_offset_with_default(args.get("before"), list_length), list_length)
+        if args.get("first") is not None:
+            end = min(end, start + args["first"])
+        if args.get("last") is not None:
+            start = max(start, end - args["last"])
+        rows = [row async for row in queryset[start:end]] if end > start else []
+
+        resolved = connection_from_list_slice(
+            rows,
+            args,
+            slice_start=start,
+            list_length=list_length,
+            list_slice_length=len(rows),
+            connection_type=connection,
+            edge_type=connection.Edge,
+            pageinfo_type=PageInfo,
+        )
+        resolved.iterable = queryset
+        resolved.length = list_length
+        return resolved
+
+
+class AsyncFilterConnectionField(AsyncConnectionMixin, DjangoFilterConnectionField):
+    pass
+
+
+# ===== Keyset Cursors =====
+def encode_cursor(value, pk):
+    payload = json.dumps([value, pk], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, field):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return field.to_python(value), int(pk)
+    except (ValueError, TypeError, ValidationError):
+        raise Exception("Invalid cursor") from None
+
+
+def sort_key(model, order_by):
+    """Resolve an ``orderBy`` argument ("orderDate", "-name") to (field, descending)."""
+    order_by = order_by or "id"
+    descending = order_by.startswith("-")
+    name = to_snake_case(order_by.lstrip("-"))
+    if name == "id":
+        return model._meta.pk, descending
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        field = None
+    if field is None or not field.concrete or field.is_relation or field.null:
+        raise Exception(f"Cannot paginate {model.__name__} by {order_by}")
+    return field, descending
+
+
+# ===== Keyset Connection Field =====
+class KeysetConnectionField(DjangoFilterConnectionField):
+    """Filterable connection paginated by ``(sort key, id)`` instead of OFFSET.
+
+    The cursor encodes the last row's sort key and id and the next page is
+    ``WHERE key >= :key AND (key > :key OR id > :id) ORDER BY key, id
+    LIMIT first + 1``, so every page costs the same index seek however deep
+    it is. Only forward pagination (``first``/``after``) is supported and no
+    COUNT(*) runs unless ``totalCount`` is selected. Under the async view the
+    page is fetched with ``async for``.
+    """
+
+    @property
+    def args(self):
+        args = to_arguments(self._base_args or OrderedDict(), self.filtering_args)
+        for name in ("before", "last", "offset"):
+            args.pop(name, None)
+        args["order_by"] = graphene.Argument(
+            graphene.String, description='Sort field, prefixed with "-" for descending.'
+        )
+        return args
+
+    @args.setter
+    def args(self, args):
+        self._base_args = args
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        queryset, first = cls.keyset_page(args, iterable, max_limit)
+        if running_async():
+            return cls.aresolve_keyset(connection, args, iterable, queryset, first)
+        return cls.keyset_connection(connection, args, iterable, list(queryset), first)
+
+    @classmethod
+    async def aresolve_keyset(cls, connection, args, iterable, queryset, first):
+        rows = [row async for row in queryset]
+        return cls.keyset_connection(connection, args, iterable, rows, first)
+
+    @classmethod
+    def keyset_page(cls, args, iterable, max_limit=None):
+        """The (unevaluated) queryset for the requested page, plus its size."""
+        field, descending = sort_key(iterable.model, args.get("order_by"))
+        key = field.attname if field.primary_key else field.name
+        direction = "-" if descending else ""
+        queryset = iterable.annotate(_keyset_value=F(key)).order_by(
+            f"{direction}{key}", f"{direction}pk"
+        )
+
+        after = args.get("after")
+        if after:
+            value, pk = decode_cursor(after, field)
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{key}__{op}e": value}),
+                Q(**{f"{key}__{op}": value}) | Q(**{f"pk__{op}": pk}),
+            )
+
+        check_page_args(args)
+        first = args.get("first")
+        if first is None:
+            first = max_limit or DEFAULT_PAGE_SIZE
+        if max_limit is not None:
+            first = min(first, max_limit)
+        return queryset[:first + 1], first
+
+    @classmethod
+    def keyset_connection(cls, connection, args, iterable, rows, first):
+        after = args.get("after")
+        has_next_page = len(rows) > first
+        rows = rows[:first]
+
+        edges = [
+            connection.Edge(node=row, cursor=encode_cursor(row._keyset_value, row.pk))
+            for row in rows
+        ]
+        resolved = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=bool(after),
+                has_next_page=has_next_page,
+            ),
+        )
+        resolved.iterable = iterable
+        resolved.length = None
+        return resolved
@@ -0,0 +1,113 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import ast
+
+from .models import OrderItem
+
+
+# ===== Selection Set Walking =====
+def _fields(selection_set, fragments):
+    """Yield the Field nodes of a selection set, flattening fragments."""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection
+        elif isinstance(selection, ast.FragmentSpread):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _fields(fragment.selection_set, fragments)
+        elif isinstance(selection, ast.InlineFragment):
+            yield from _fields(selection.selection_set, fragments)
+
+
+def _children(field_nodes, fragments):
+    """Group the sub-fields of ``field_nodes`` by their snake_case name."""
+    children = {}
+    for field_node in field_nodes:
+        for child in _fields(field_node.selection_set, fragments):
+            children.setdefault(to_snake_case(child.name.value), []).append(child)
+    return children
+
+
+def _connection_nodes(field_nodes, fragments):
+    """Return the ``edges { node }`` field nodes of a connection selection."""
+    edges = _children(field_nodes, fragments).get("edges", [])
+    return _children(edges, fragments).get("node", [])
+
+
+def selected_fields(info):
+    """snake_case names of the fields selected under the field being resolved."""
+    return set(_children(info.field_asts, info.fragments))
+
+
+# ===== Query Planning =====
+# Model properties exposed as GraphQL fields, with the columns they read.
+COMPUTED_FIELDS = {
+    OrderItem: {"line_total": ("quantity", "unit_price")},
+}
+
+
+def _plan(queryset, node_fields, fragments, required=()):
+    """Apply only()/select_related()/prefetch_related() for one node selection."""
+    model = queryset.model
+    only = {model._meta.pk.name, *required}
+    select_related = []
+    prefetches = []
+
+    for name, field_nodes in _children(node_fields, fragments).items():
+        if name == "id":
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            only.update(COMPUTED_FIELDS.get(model, {}).get(name, ()))
+            continue
+
+        if field.many_to_one:
+            # Forward FK (Order.customer): join it and load only what is selected.
+            related_model = field.related_model
+            only.add(name)
+            only.add(f"{name}__{related_model._meta.pk.name}")
+            for child in _children(field_nodes, fragments):
+                try:
+                    child_field = related_model._meta.get_field(child)
+                except FieldDoesNotExist:
+                    continue
+                if child_field.concrete and not child_field.is_relation:
+                    only.add(f"{name}__{child}")
+            select_related.append(name)
+        elif field.many_to_many or field.one_to_many:
+            # Connections (Order.products, Customer.orders, Product.orders) select
+            # through edges.node; plain lists (Order.items) select fields directly.
+            # Reverse FKs must keep the FK column so Django can match rows to parents.
+            parent_fk = (field.field.name,) if field.one_to_many else ()
+            related_queryset = _plan(
+                field.related_model._default_manager.order_by("pk"),
+                _connection_nodes(field_nodes, fragments) or field_nodes,
+                fragments,
+                parent_fk,
+            )
+            prefetches.append(Prefetch(name, queryset=related_queryset))
+        elif field.concrete:
+            only.add(name)
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset.only(*only)
+
+
+def optimize_queryset(queryset, info):
+    """Shape ``queryset`` to the ``edges.node`` selection of the field being resolved.
+
+    Only the selected columns are loaded, forward foreign keys are joined with
+    select_related() and nested connections are prefetched with their own
+    narrowed querysets, so a query never hydrates more than it returns.
+    """
+    node_fields = _connection_nodes(info.field_asts, info.fragments)
+    if not node_fields:
+        return queryset
+    return _plan(queryset, node_fields, info.fragments)
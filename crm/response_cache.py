@@ -0,0 +1,157 @@
+import hashlib
+import json
+import time
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from graphql.language import ast
+from graphql.language.printer import print_ast
+from graphql.type.definition import get_named_type
+
+from .documents import document_cache
+from .models import Customer, DailySalesRollup, Order, OrderItem, Product
+
+# ===== Response Cache =====
+# Opt-in cache of query results, keyed by (normalized document, variables,
+# operation, user). Every entry also carries the current version of each
+# model tag its selection touches; writing to a model bumps that tag, so the
+# entries that read it are never served again while everything else stays
+# cached. Versions start at a timestamp, so a version evicted from the cache
+# can never come back as an older number.
+
+RESPONSE_PREFIX = "crm:response:"
+TAG_PREFIX = "crm:tag:"
+
+# Types whose data comes from models without being DjangoObjectTypes.
+TYPE_MODELS = {
+    "CrmStatsType": (Customer, Order, OrderItem),
+    "StatsBucketType": (Order, OrderItem),
+    "SalesRollupRowType": (DailySalesRollup,),
+    "SearchResultType": (Customer, Product, Order),
+}
+
+
+def cache_settings():
+    options = {"TIMEOUT": 60, "FIELDS": []}
+    options.update(getattr(settings, "GRAPHQL_RESPONSE_CACHE", {}))
+    return options
+
+
+def model_tag(model):
+    return model._meta.label_lower
+
+
+def _type_tags(graphql_type):
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    model = getattr(getattr(graphene_type, "_meta", None), "model", None)
+    if model is not None:
+        return {model_tag(model)}
+    return {model_tag(m) for m in TYPE_MODELS.get(graphql_type.name, ())}
+
+
+def _collect_tags(schema, parent_type, selection_set, fragments, tags):
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.FragmentSpread):
+            fragment = fragments[selection.name.value]
+            fragment_type = schema.get_type(fragment.type_condition.name.value)
+            _collect_tags(schema, fragment_type, fragment.selection_set, fragments, tags)
+        elif isinstance(selection, ast.InlineFragment):
+            fragment_type = parent_type
+            if selection.type_condition:
+                fragment_type = schema.get_type(selection.type_condition.name.value)
+            _collect_tags(schema, fragment_type, selection.selection_set, fragments, tags)
+        else:
+            field = getattr(parent_type, "fields", {}).get(selection.name.value)
+            if field is None:
+                continue
+            field_type = get_named_type(field.type)
+            tags |= _type_tags(field_type)
+            if selection.selection_set:
+                _collect_tags(schema, field_type, selection.selection_set, fragments, tags)
+
+
+@lru_cache(maxsize=512)
+def cache_plan(schema, query, operation_name):
+    """``(root fields, normalized document hash, tags)`` for a query operation.
+
+    Returns None for invalid documents, mutations and subscriptions.
+    """
+    document_ast, errors = document_cache.get(schema, query)
+    if errors:
+        return None
+    operations = [d for d in document_ast.definitions if isinstance(d, ast.OperationDefinition)]
+    if operation_name:
+        operations = [op for op in operations if op.name and op.name.value == operation_name]
+    if len(operations) != 1 or operations[0].operation != "query":
+        return None
+    operation = operations[0]
+
+    root_fields = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, ast.Field):
+            return None
+        if selection.name.value != "__typename":
+            root_fields.add(selection.name.value)
+
+    fragments = {
+        d.name.value: d for d in document_ast.definitions
+        if isinstance(d, ast.FragmentDefinition)
+    }
+    tags = set()
+    _collect_tags(schema, schema.get_query_type(), operation.selection_set, fragments, tags)
+    normalized = hashlib.sha256(print_ast(document_ast).encode("utf-8")).hexdigest()
+    return frozenset(root_fields), normalized, tuple(sorted(tags))
+
+
+def _tag_versions(tags):
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def response_key(schema, query, variables, operation_name, user):
+    """Cache key for this request, or None if its result must not be cached."""
+    if not cache_settings()["TIMEOUT"]:
+        return None
+    plan = cache_plan(schema, query, operation_name)
+    if plan is None:
+        return None
+    root_fields, normalized, tags = plan
+    # Opt-in: every root field selected must be listed as cacheable.
+    if not root_fields or not root_fields <= set(cache_settings()["FIELDS"]):
+        return None
+    user_key = user.pk if user is not None and user.is_authenticated else "anon"
+    payload = json.dumps(
+        [normalized, variables or {}, operation_name, user_key, _tag_versions(tags)],
+        sort_keys=True, default=str,
+    )
+    return RESPONSE_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_response(key):
+    return cache.get(key)
+
+
+def set_response(key, data):
+    cache.set(key, data, cache_settings()["TIMEOUT"])
+
+
+# ===== Invalidation =====
+def _bump(tags):
+    for tag in tags:
+        key = TAG_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def invalidate(*models):
+    """Expire cached responses that read any of ``models``, once the write commits."""
+    transaction.on_commit(partial(_bump, {model_tag(model) for model in models}))
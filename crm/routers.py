@@ -0,0 +1,44 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# ===== Read Replica Routing =====
+# Enabled by settings when DATABASE_REPLICAS is not empty. Everything uses
+# the primary unless replicas are allowed for the current context: the
+# GraphQL views allow them for query operations only, so mutations read
+# their own writes and Celery tasks, cron jobs and management commands
+# never act on lagging data. A read made inside an open transaction on the
+# primary stays there too. Writes and migrations always use the primary.
+
+_replicas_allowed = ContextVar("crm_db_replicas_allowed", default=False)
+
+
+@contextmanager
+def use_replicas():
+    """Let reads made inside the block go to a replica."""
+    token = _replicas_allowed.set(True)
+    try:
+        yield
+    finally:
+        _replicas_allowed.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _replicas_allowed.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -1,12 +1,25 @@
-from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.filter.utils import get_filtering_args_from_filterset
 from .filters import CustomerFilter, ProductFilter, OrderFilter
 import graphene
 from graphene_django import DjangoObjectType
-from .models import Customer, Product, Order
+from graphene_django.settings import graphene_settings
+from .models import Customer, Product, Order, OrderItem
+from .loaders import get_loaders, prefetched
+from .pagination import AsyncFilterConnectionField, CountableConnection, KeysetConnectionField
+from .planner import optimize_queryset, selected_fields
+from .response_cache import invalidate
+from .search import search
+from .services import (
+    CENTS, PHONE_RE, CrmStats, add_to_sales_rollup, bulk_create_customers, bulk_create_orders,
+    order_lines, orders_pending_reminder, product_error, recent_orders, reserve_stock,
+    restock_error, restock_low_stock, sales_rollup,
+)
 from crm.models import Product
 from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.db import transaction
-import re
+from asgiref.sync import sync_to_async
+from .aio import alist, running_async
 
 
 
@@ -16,6 +29,13 @@ class CustomerType(DjangoObjectType):
         model = Customer
         interfaces = (graphene.relay.Node,)
         fields = "__all__"
+        connection_class = CountableConnection
+
+    def resolve_orders(self, info, **kwargs):
+        orders = prefetched(self, "orders")
+        if orders is not None:
+            return orders
+        return get_loaders(info).customer_orders.load(self.pk)
 
 
 class ProductType(DjangoObjectType):
@@ -23,6 +43,26 @@ class ProductType(DjangoObjectType):
         model = Product
         interfaces = (graphene.relay.Node,)
         fields = "__all__"
+        connection_class = CountableConnection
+
+    def resolve_orders(self, info, **kwargs):
+        orders = prefetched(self, "orders")
+        if orders is not None:
+            return orders
+        return get_loaders(info).product_orders.load(self.pk)
+
+
+class OrderItemType(DjangoObjectType):
+    class Meta:
+        model = OrderItem
+        fields = ("id", "product", "quantity", "unit_price")
+
+    line_total = graphene.Decimal()
+
+    def resolve_product(self, info):
+        if OrderItem.product.is_cached(self):
+            return self.product
+        return get_loaders(info).product.load(self.product_id)
 
 
 class OrderType(DjangoObjectType):
@@ -30,6 +70,89 @@ class OrderType(DjangoObjectType):
         model = Order
         interfaces = (graphene.relay.Node,)
         fields = "__all__"
+        connection_class = CountableConnection
+
+    def resolve_customer(self, info):
+        if Order.customer.is_cached(self):
+            return self.customer
+        return get_loaders(info).customer.load(self.customer_id)
+
+    def resolve_products(self, info, **kwargs):
+        products = prefetched(self, "products")
+        if products is not None:
+            return products
+        return get_loaders(info).order_products.load(self.pk)
+
+    def resolve_items(self, info):
+        items = prefetched(self, "items")
+        if items is not None:
+            return items
+        return get_loaders(info).order_items.load(self.pk)
+
+
+# ===== Report Types =====
+class StatsGroupBy(graphene.Enum):
+    DAY = "day"
+    WEEK = "week"
+    PRODUCT = "product"
+
+
+class StatsBucketType(graphene.ObjectType):
+    key = graphene.String()
+    product_id = graphene.ID()
+    order_count = graphene.Int()
+    units = graphene.Int()
+    revenue = graphene.Decimal()
+    average_order_value = graphene.Decimal()
+
+
+class CrmStatsType(graphene.ObjectType):
+    customer_count = graphene.Int()
+    active_customer_count = graphene.Int()
+    order_count = graphene.Int()
+    revenue = graphene.Decimal()
+    average_order_value = graphene.Decimal()
+    groups = graphene.List(StatsBucketType)
+
+
+class SalesRollupGroupBy(graphene.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    PRODUCT = "product"
+
+
+class SalesRollupRowType(graphene.ObjectType):
+    period = graphene.Date()
+    product_id = graphene.ID()
+    product_name = graphene.String()
+    units = graphene.Int()
+    revenue = graphene.Decimal()
+    order_count = graphene.Int()
+
+    def resolve_product_name(row, info):
+        return row.get("product__name")
+
+    def resolve_revenue(row, info):
+        # SQLite returns SUM()s of decimals without their scale.
+        return row["revenue"].quantize(CENTS)
+
+
+class SearchKind(graphene.Enum):
+    CUSTOMER = "customer"
+    PRODUCT = "product"
+    ORDER = "order"
+
+
+class SearchNode(graphene.Union):
+    class Meta:
+        types = (CustomerType, ProductType, OrderType)
+
+
+class SearchResultType(graphene.ObjectType):
+    type = SearchKind()
+    rank = graphene.Float()
+    node = graphene.Field(SearchNode)
 
 
 # ===== Input Types =====
@@ -45,9 +168,16 @@ class ProductInput(graphene.InputObjectType):
     stock = graphene.Int(required=False, default_value=0)
 
 
+class OrderItemInput(graphene.InputObjectType):
+    product_id = graphene.ID(required=True)
+    quantity = graphene.Int(required=False, default_value=1)
+
+
 class OrderInput(graphene.InputObjectType):
     customer_id = graphene.ID(required=True)
-    product_ids = graphene.List(graphene.ID, required=True)
+    # Each entry in product_ids is one unit; use items to order quantities.
+    product_ids = graphene.List(graphene.ID, required=False)
+    items = graphene.List(OrderItemInput, required=False)
     order_date = graphene.DateTime(required=False)
 
 
@@ -60,10 +190,13 @@ class CreateCustomer(graphene.Mutation):
     message = graphene.String()
 
     def mutate(self, info, input):
+        if running_async():
+            return CreateCustomer.amutate(input)
+
         if Customer.objects.filter(email=input.email).exists():
             raise Exception("Email already exists")
 
-        if input.phone and not re.match(r"^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$", input.phone):
+        if input.phone and not PHONE_RE.match(input.phone):
             raise Exception("Invalid phone format")
 
         customer = Customer.objects.create(
@@ -71,6 +204,19 @@ class CreateCustomer(graphene.Mutation):
         )
         return CreateCustomer(customer=customer, message="Customer created successfully")
 
+    @staticmethod
+    async def amutate(input):
+        if await Customer.objects.filter(email=input.email).aexists():
+            raise Exception("Email already exists")
+
+        if input.phone and not PHONE_RE.match(input.phone):
+            raise Exception("Invalid phone format")
+
+        customer = await Customer.objects.acreate(
+            name=input.name, email=input.email, phone=input.phone
+        )
+        return CreateCustomer(customer=customer, message="Customer created successfully")
+
 
 # ===== Bulk Create Customers =====
 class BulkCreateCustomers(graphene.Mutation):
@@ -80,24 +226,16 @@ class BulkCreateCustomers(graphene.Mutation):
     customers = graphene.List(CustomerType)
     errors = graphene.List(graphene.String)
 
-    @transaction.atomic
     def mutate(self, info, input):
-        customers = []
-        errors = []
-        for data in input:
-            try:
-                if Customer.objects.filter(email=data.email).exists():
-                    errors.append(f"Email already exists: {data.email}")
-                    continue
-                if data.phone and not re.match(r"^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$", data.phone):
-                    errors.append(f"Invalid phone format: {data.phone}")
-                    continue
-                customer = Customer.objects.create(
-                    name=data.name, email=data.email, phone=data.phone
-                )
-                customers.append(customer)
-            except Exception as e:
-                errors.append(str(e))
+        if running_async():
+            # Transactions have no async API; run the batch in a worker thread.
+            return sync_to_async(BulkCreateCustomers.create)(input)
+        return BulkCreateCustomers.create(input)
+
+    @staticmethod
+    @transaction.atomic
+    def create(input):
+        customers, errors = bulk_create_customers(input)
         return BulkCreateCustomers(customers=customers, errors=errors)
 
 
@@ -110,16 +248,25 @@ class CreateProduct(graphene.Mutation):
     message = graphene.String()
 
     def mutate(self, info, input):
-        if input.price <= 0:
-            raise Exception("Price must be positive")
-        if input.stock < 0:
-            raise Exception("Stock cannot be negative")
+        error = product_error(input.price, input.stock)
+        if error:
+            raise Exception(error)
+
+        if running_async():
+            return CreateProduct.amutate(input)
 
         product = Product.objects.create(
             name=input.name, price=input.price, stock=input.stock
         )
         return CreateProduct(product=product, message="Product created successfully")
 
+    @staticmethod
+    async def amutate(input):
+        product = await Product.objects.acreate(
+            name=input.name, price=input.price, stock=input.stock
+        )
+        return CreateProduct(product=product, message="Product created successfully")
+
 
 # ===== Create Order =====
 class CreateOrder(graphene.Mutation):
@@ -130,44 +277,108 @@ class CreateOrder(graphene.Mutation):
     message = graphene.String()
 
     def mutate(self, info, input):
+        if running_async():
+            return CreateOrder.amutate(input)
+
         try:
             customer = Customer.objects.get(pk=input.customer_id)
         except Customer.DoesNotExist:
             raise Exception("Invalid customer ID")
 
-        if not input.product_ids:
+        lines = CreateOrder.lines(input)
+        products = Product.objects.in_bulk([pk for pk in lines if pk is not None])
+        return CreateOrder.place(input, customer, lines, products)
+
+    @staticmethod
+    async def amutate(input):
+        try:
+            customer = await Customer.objects.aget(pk=input.customer_id)
+        except Customer.DoesNotExist:
+            raise Exception("Invalid customer ID")
+
+        lines = CreateOrder.lines(input)
+        products = await Product.objects.ain_bulk([pk for pk in lines if pk is not None])
+        # Transactions have no async API; the writes run in a worker thread.
+        return await sync_to_async(CreateOrder.place)(input, customer, lines, products)
+
+    @staticmethod
+    def lines(input):
+        lines, error = order_lines(input)
+        if error:
+            raise Exception(error)
+        if not lines:
             raise Exception("At least one product ID is required")
+        return lines
 
-        products = Product.objects.filter(id__in=input.product_ids)
-        if len(products) != len(input.product_ids):
+    @staticmethod
+    @transaction.atomic
+    def place(input, customer, lines, products):
+        if len(products) != len(lines):
             raise Exception("One or more product IDs are invalid")
 
+        reserve_stock(lines)
+
+        # The total comes from the prices already fetched above and the line
+        # items snapshot those prices, so creating an order is two INSERTs.
         order = Order.objects.create(
             customer=customer,
             order_date=input.order_date or timezone.now(),
+            total_amount=sum(products[pk].price * qty for pk, qty in lines.items()),
         )
-        order.products.set(products)
-        order.total_amount = sum(p.price for p in products)
-        order.save()
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[pk], quantity=qty, unit_price=products[pk].price)
+            for pk, qty in lines.items()
+        ])
+        add_to_sales_rollup([
+            (order.order_date, {pk: (qty, products[pk].price) for pk, qty in lines.items()})
+        ])
+        invalidate(OrderItem)
 
         return CreateOrder(order=order, message="Order created successfully")
     
+# ===== Bulk Create Orders =====
+class BulkCreateOrders(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(OrderInput, required=True)
+
+    orders = graphene.List(OrderType)
+    errors = graphene.List(graphene.String)
+
+    def mutate(self, info, input):
+        if running_async():
+            return sync_to_async(BulkCreateOrders.create)(input)
+        return BulkCreateOrders.create(input)
+
+    @staticmethod
+    @transaction.atomic
+    def create(input):
+        orders, errors = bulk_create_orders(input)
+        return BulkCreateOrders(orders=orders, errors=errors)
+
+
 # ===== Update Low Stock Products =====
 class UpdateLowStockProducts(graphene.Mutation):
     class Arguments:
-        pass  # no arguments needed
+        threshold = graphene.Int(required=False, default_value=10)
+        amount = graphene.Int(required=False, default_value=10)
 
     success = graphene.String()
     updated_products = graphene.List(lambda: ProductType)
 
-    def mutate(self, info):
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        updated_products = []
+    def mutate(self, info, threshold=10, amount=10):
+        error = restock_error(threshold, amount)
+        if error:
+            raise Exception(error)
 
-        for product in low_stock_products:
-            product.stock += 10  # Simulate restocking
-            product.save()
-            updated_products.append(product)
+        if running_async():
+            return sync_to_async(UpdateLowStockProducts.restock)(threshold, amount)
+        return UpdateLowStockProducts.restock(threshold, amount)
+
+    @staticmethod
+    def restock(threshold, amount):
+        # One UPDATE ... SET stock = stock + amount, so a concurrent order
+        # decrement can never be overwritten by a stale read.
+        updated_products = restock_low_stock(threshold=threshold, amount=amount)
 
         success_msg = f"Updated {len(updated_products)} low-stock products."
 
@@ -184,6 +395,7 @@ class Mutation(graphene.ObjectType):
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    bulk_create_orders = BulkCreateOrders.Field()
     update_low_stock_products = UpdateLowStockProducts.Field() 
 
     
@@ -192,31 +404,106 @@ class Mutation(graphene.ObjectType):
 
 # ===== Query =====
 class Query(graphene.ObjectType):
-    all_customers = DjangoFilterConnectionField(CustomerType, filterset_class=CustomerFilter, order_by=graphene.String())
-    all_products = DjangoFilterConnectionField(ProductType, filterset_class=ProductFilter, order_by=graphene.String())
-    all_orders = DjangoFilterConnectionField(OrderType, filterset_class=OrderFilter, order_by=graphene.String())
+    hello = graphene.String(default_value="Hello, GraphQL!")
+
+    all_customers = AsyncFilterConnectionField(CustomerType, filterset_class=CustomerFilter, order_by=graphene.String())
+    all_products = AsyncFilterConnectionField(ProductType, filterset_class=ProductFilter, order_by=graphene.String())
+    all_orders = AsyncFilterConnectionField(OrderType, filterset_class=OrderFilter, order_by=graphene.String())
+
+    crm_stats = graphene.Field(
+        CrmStatsType,
+        group_by=StatsGroupBy(),
+        **get_filtering_args_from_filterset(OrderFilter, OrderType)
+    )
+
+    # Reads the pre-aggregated DailySalesRollup table, never the orders.
+    sales_rollup = graphene.List(
+        SalesRollupRowType,
+        date_from=graphene.Date(name="from"),
+        date_to=graphene.Date(name="to"),
+        group_by=SalesRollupGroupBy(default_value="day"),
+    )
+
+    # Ranked word-prefix search over the full-text indexes (crm/search.py).
+    search = graphene.List(
+        SearchResultType,
+        term=graphene.String(required=True),
+        types=graphene.List(SearchKind),
+        first=graphene.Int(default_value=10),
+    )
+
+    # Opt-in keyset pagination: constant cost per page, totalCount on demand.
+    all_customers_keyset = KeysetConnectionField(CustomerType, filterset_class=CustomerFilter)
+    all_products_keyset = KeysetConnectionField(ProductType, filterset_class=ProductFilter)
+    all_orders_keyset = KeysetConnectionField(OrderType, filterset_class=OrderFilter)
+
+    # Reminder selection: the date window is applied in SQL on the order_date index.
+    recent_orders = KeysetConnectionField(
+        OrderType, filterset_class=OrderFilter, since=graphene.DateTime(required=True)
+    )
+    orders_pending_reminder = KeysetConnectionField(
+        OrderType, filterset_class=OrderFilter, since=graphene.DateTime(required=True)
+    )
 
     def resolve_all_customers(root, info, **kwargs):
-        qs = Customer.objects.all()
+        qs = optimize_queryset(Customer.objects.all(), info)
         order_by = kwargs.get("order_by")
         if order_by:
             qs = qs.order_by(order_by)
         return qs
 
     def resolve_all_products(root, info, **kwargs):
-        qs = Product.objects.all()
+        qs = optimize_queryset(Product.objects.all(), info)
         order_by = kwargs.get("order_by")
         if order_by:
             qs = qs.order_by(order_by)
         return qs
 
     def resolve_all_orders(root, info, **kwargs):
-        qs = Order.objects.all()
+        qs = optimize_queryset(Order.objects.all(), info)
         order_by = kwargs.get("order_by")
         if order_by:
             qs = qs.order_by(order_by)
         return qs
 
+    def resolve_crm_stats(root, info, group_by=None, **kwargs):
+        filterset = OrderFilter(data=kwargs, queryset=Order.objects.all(), request=info.context)
+        if not filterset.form.is_valid():
+            raise ValidationError(filterset.form.errors.as_json())
+        stats = CrmStats(filterset.qs, group_by=group_by)
+        if running_async():
+            return stats.aevaluate(selected_fields(info))
+        return stats
+
+    def resolve_sales_rollup(root, info, date_from=None, date_to=None, group_by="day"):
+        rows = sales_rollup(date_from, date_to, group_by)
+        if running_async():
+            return alist(rows)
+        return list(rows)
+
+    def resolve_search(root, info, term, types=None, first=10):
+        max_results = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if not 0 < first <= max_results:
+            raise Exception(f"first must be between 1 and {max_results}")
+        if running_async():
+            return sync_to_async(search)(term, types, first)
+        return search(term, types, first)
+
+    def resolve_all_customers_keyset(root, info, **kwargs):
+        return optimize_queryset(Customer.objects.all(), info)
+
+    def resolve_all_products_keyset(root, info, **kwargs):
+        return optimize_queryset(Product.objects.all(), info)
+
+    def resolve_all_orders_keyset(root, info, **kwargs):
+        return optimize_queryset(Order.objects.all(), info)
+
+    def resolve_recent_orders(root, info, since, **kwargs):
+        return optimize_queryset(recent_orders(since), info)
+
+    def resolve_orders_pending_reminder(root, info, since, **kwargs):
+        return optimize_queryset(orders_pending_reminder(since), info)
+
 
     #all_customers = graphene.List(CustomerType)
     #all_products = graphene.List(ProductType)
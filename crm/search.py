@@ -0,0 +1,280 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Customer, Order, Product
+
+# ===== Substring (icontains) Indexes =====
+# Columns searched with icontains by crm/filters.py. On SQLite each one gets
+# an external-content FTS5 table with the trigram tokenizer, kept in sync by
+# triggers; on Postgres a pg_trgm GIN index on UPPER(column), which is the
+# expression Django's icontains compiles to.
+TRIGRAM_COLUMNS = [
+    ("crm_customer", "name"),
+    ("crm_customer", "email"),
+    ("crm_product", "name"),
+]
+
+# Trigram indexes cannot answer patterns shorter than one trigram.
+MIN_TRIGRAM_LENGTH = 3
+
+
+def trigram_table(table, column):
+    return f"{table}_{column}_trgm"
+
+
+def _sqlite_trigram_sql(table, column):
+    fts = trigram_table(table, column)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+def install_trigram_indexes(schema_editor, rebuild=True):
+    """Create the substring indexes for the current backend (idempotent)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for table, column in TRIGRAM_COLUMNS:
+            for sql in _sqlite_trigram_sql(table, column):
+                schema_editor.execute(sql)
+            if rebuild:
+                fts = trigram_table(table, column)
+                schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, column in TRIGRAM_COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {trigram_table(table, column)} "
+                f"ON {table} USING gin (UPPER({column}) gin_trgm_ops)"
+            )
+
+
+def filter_contains(queryset, field_path, value):
+    """``<field_path>__icontains=value`` that is answered from a trigram index.
+
+    ``field_path`` may follow relations (``customer__name``). On SQLite the
+    match is a rowid subquery against the FTS5 trigram table; Postgres uses the
+    GIN index for the plain lookup. Short patterns, LIKE wildcards and
+    unindexed columns fall back to a regular icontains.
+    """
+    *relations, column = field_path.split("__")
+    model = queryset.model
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    table = model._meta.db_table
+
+    indexed = (
+        connection.vendor == "sqlite"
+        and (table, column) in TRIGRAM_COLUMNS
+        and len(value) >= MIN_TRIGRAM_LENGTH
+        and "%" not in value
+        and "_" not in value
+    )
+    if not indexed:
+        return queryset.filter(**{f"{field_path}__icontains": value})
+
+    fts = trigram_table(table, column)
+    ids = RawSQL(f"SELECT rowid FROM {fts} WHERE {column} LIKE %s", [f"%{value}%"])
+    return queryset.filter(**{"__".join([*relations, "pk__in"]): ids})
+
+
+# ===== Full-Text Search =====
+# The `search` query ranks customers and products by word prefixes. On
+# SQLite each model gets an external-content FTS5 table (unicode61
+# tokenizer, prefix indexes for 2 and 3 characters) kept in sync by
+# triggers, so bulk_create, update() and raw deletes are covered too; on
+# Postgres a GIN index on a weighted tsvector expression, which needs no
+# syncing. Other backends fall back to unranked icontains.
+SEARCH_INDEXES = {
+    "customer": ("crm_customer", {"name": 2.0, "email": 1.0}),
+    "product": ("crm_product", {"name": 1.0}),
+}
+
+# unicode61 splits on everything but letters and digits; queries and the
+# Postgres vectors are tokenized the same way.
+SEARCH_TOKEN_RE = re.compile(r"[^\W_]+")
+SEARCH_SEPARATORS = "@.-_+"
+SEARCH_WEIGHTS = "ABCD"
+SEARCH_MODELS = {"customer": Customer, "product": Product, "order": Order}
+
+# A short prefix can match most of the table. Only this many prefix
+# matches, newest first, are scored, so the cost of a type-ahead lookup
+# stays flat however many rows match; shorter terms are not searched by
+# prefix, though a number of any length still finds the order with that id.
+# Whole-word matches get a wider window, so an older exact match is not
+# crowded out by newer rows that merely share the prefix.
+SEARCH_CANDIDATES = 200
+SEARCH_EXACT_CANDIDATES = 2000
+MIN_SEARCH_LENGTH = 2
+
+
+def search_table(table):
+    return f"{table}_fts"
+
+
+def search_tokens(term):
+    tokens = [token.lower() for token in SEARCH_TOKEN_RE.findall(term or "")]
+    if sum(map(len, tokens)) >= MIN_SEARCH_LENGTH or all(token.isdigit() for token in tokens):
+        return tokens
+    return []
+
+
+def _sqlite_search_sql(table, columns):
+    fts = search_table(table)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    ]
+
+
+def _postgres_vector(columns):
+    return " || ".join(
+        f"setweight(to_tsvector('simple'::regconfig, "
+        f"translate(coalesce({column}, ''), '{SEARCH_SEPARATORS}', '{' ' * len(SEARCH_SEPARATORS)}')), "
+        f"'{SEARCH_WEIGHTS[index]}')"
+        for index, column in enumerate(columns)
+    )
+
+
+def install_search_indexes(schema_editor, rebuild=True):
+    """Create the full-text indexes for the current backend (idempotent)."""
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_INDEXES.values():
+        if vendor == "sqlite":
+            for sql in _sqlite_search_sql(table, columns):
+                schema_editor.execute(sql)
+            if rebuild:
+                fts = search_table(table)
+                schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+        elif vendor == "postgresql":
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {search_table(table)} "
+                f"ON {table} USING gin (({_postgres_vector(columns)}))"
+            )
+            if rebuild:
+                schema_editor.execute(f"REINDEX INDEX {search_table(table)}")
+
+
+def ranked_ids(kind, tokens, limit):
+    """``[(id, rank)]`` of the best ``limit`` matches, highest rank first.
+
+    Every token must match the start of a word in one of the columns. The
+    newest SEARCH_EXACT_CANDIDATES whole-word matches and the newest
+    SEARCH_CANDIDATES prefix matches are scored (bm25 on SQLite, ts_rank
+    on Postgres) and the best of them returned.
+    """
+    table, columns = SEARCH_INDEXES[kind]
+    if sum(map(len, tokens)) < MIN_SEARCH_LENGTH:
+        return []
+    # (FTS5 query, tsquery, how many of the newest matches to score)
+    matches = [
+        (" ".join(f'"{token}"' for token in tokens), " & ".join(tokens), SEARCH_EXACT_CANDIDATES),
+        (
+            " ".join(f'"{token}"*' for token in tokens),
+            " & ".join(f"{token}:*" for token in tokens),
+            SEARCH_CANDIDATES,
+        ),
+    ]
+    if connection.vendor == "sqlite":
+        # FTS5 walks its doclists in rowid order, so bm25() is only
+        # evaluated for the rows the LIMIT lets through.
+        fts = search_table(table)
+        weights = ", ".join(str(weight) for weight in columns.values())
+        sql = (
+            f"SELECT rowid, -bm25({fts}, {weights}) FROM {fts} "
+            f"WHERE {fts} MATCH %s ORDER BY rowid DESC LIMIT %s"
+        )
+        queries = [(sql, [match, max(limit, candidates)]) for match, _, candidates in matches]
+    elif connection.vendor == "postgresql":
+        vector = _postgres_vector(columns)
+        sql = (
+            f"SELECT id, ts_rank({vector}, query) FROM ("
+            f"SELECT id, {', '.join(columns)}, query FROM {table}, to_tsquery('simple', %s) query "
+            f"WHERE {vector} @@ query ORDER BY id DESC LIMIT %s) candidates"
+        )
+        queries = [(sql, [tsquery, max(limit, candidates)]) for _, tsquery, candidates in matches]
+    else:
+        queryset = SEARCH_MODELS[kind].objects.all()
+        for token in tokens:
+            match = Q()
+            for column in columns:
+                match |= Q(**{f"{column}__icontains": token})
+            queryset = queryset.filter(match)
+        return [(pk, 0.0) for pk in queryset.order_by("pk").values_list("pk", flat=True)[:limit]]
+
+    scores = {}
+    with connection.cursor() as cursor:
+        for sql, params in queries:
+            cursor.execute(sql, params)
+            for pk, score in cursor.fetchall():
+                scores[pk] = max(float(score), scores.get(pk, float("-inf")))
+    scored = sorted(((score, pk) for pk, score in scores.items()), reverse=True)
+    return [(pk, score) for score, pk in scored[:limit]]
+
+
+def search(term, types=None, first=10):
+    """Ranked customers, products and orders matching ``term``.
+
+    Returns up to ``first`` dicts with ``type``, ``rank`` and ``node``,
+    best first; ``types`` defaults to all of SEARCH_MODELS. Orders match by
+    id when the term is a number, and through their customer otherwise,
+    newest first within a customer.
+    """
+    types = set(types or SEARCH_MODELS)
+    tokens = search_tokens(term)
+    hits = []
+    customers = ranked_ids("customer", tokens, first) if {"customer", "order"} & types else []
+    if "customer" in types:
+        hits += [("customer", pk, rank) for pk, rank in customers]
+    if "product" in types:
+        hits += [("product", pk, rank) for pk, rank in ranked_ids("product", tokens, first)]
+    if "order" in types:
+        best = max([rank for _, _, rank in hits] + [rank for _, rank in customers] + [0.0])
+        if len(tokens) == 1 and tokens[0].isdigit():
+            exact = Order.objects.filter(pk=int(tokens[0])).values_list("pk", flat=True)
+            hits += [("order", pk, best + 1.0) for pk in exact]
+        if customers:
+            customer_rank = dict(customers)
+            orders = (
+                Order.objects.filter(customer_id__in=customer_rank)
+                .annotate(rank=Case(
+                    *[When(customer_id=pk, then=Value(rank)) for pk, rank in customers],
+                    output_field=FloatField(),
+                ))
+                .order_by("-rank", "-order_date", "-pk")
+                .values_list("pk", "rank")[:first]
+            )
+            hits += [("order", pk, rank) for pk, rank in orders]
+
+    hits.sort(key=lambda hit: -hit[2])
+    hits = hits[:first]
+    nodes = {
+        kind: SEARCH_MODELS[kind].objects.in_bulk([pk for hit_kind, pk, _ in hits if hit_kind == kind])
+        for kind in {kind for kind, _, _ in hits}
+    }
+    return [
+        {"type": kind, "rank": rank, "node": nodes[kind][pk]}
+        for kind, pk, rank in hits
+        if pk in nodes[kind]
+    ]
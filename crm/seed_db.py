@@ -1,4 +1,5 @@
-from crm.models import Customer, Product, Order
+from crm.models import Customer, Product, Order, OrderItem
+from crm.services import add_to_sales_rollup
 from django.utils import timezone
 
 # Clear existing data (optional)
@@ -27,11 +28,14 @@ alice = Customer.objects.get(email="alice@example.com")
 laptop = Product.objects.get(name="Laptop")
 phone = Product.objects.get(name="Phone")
 
-# ✅ Correct way: Save the order first, then set products, then compute total
-order = Order.objects.create(customer=alice, order_date=timezone.now())
-order.products.set([laptop, phone])
-order.total_amount = sum(p.price for p in order.products.all())
-order.save()
+# Snapshot each product's price on its line item; the total is their sum
+order = Order.objects.create(
+    customer=alice, order_date=timezone.now(), total_amount=laptop.price + phone.price
+)
+OrderItem.objects.bulk_create([
+    OrderItem(order=order, product=p, unit_price=p.price) for p in (laptop, phone)
+])
+add_to_sales_rollup([(order.order_date, {p.pk: (1, p.price) for p in (laptop, phone)})])
 
 print("✅ Database seeded successfully!")
 print(f"Customers: {Customer.objects.count()}")
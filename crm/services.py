@@ -0,0 +1,753 @@
+import re
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import connection, transaction
+from django.db.models import (
+    Case, Count, DateField, DecimalField, Exists, F, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Customer, DailySalesRollup, DirtySalesDate, Order, OrderItem, Product
+from .response_cache import invalidate
+
+PHONE_RE = re.compile(r"^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$")
+
+# SQLite caps bound variables per statement, so large `__in` lookups and
+# inserts are split into chunks of this size.
+QUERY_CHUNK_SIZE = 500
+
+
+def chunked(items, size=QUERY_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_emails(emails):
+    """Return the subset of ``emails`` already used by a customer."""
+    emails = list(emails)
+    found = set()
+    for chunk in chunked(emails):
+        found.update(
+            Customer.objects.filter(email__in=chunk).values_list("email", flat=True)
+        )
+    return found
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def product_error(price, stock):
+    """Return why a product's price/stock is rejected, or None if it is valid."""
+    if not price.is_finite():
+        return "Price must be a number"
+    if price <= 0:
+        return "Price must be positive"
+    if stock < 0:
+        return "Stock cannot be negative"
+    return None
+
+
+def order_lines(row):
+    """Collapse an order input's ``product_ids`` and ``items`` into {product_id: quantity}.
+
+    Each entry of ``product_ids`` counts as one unit. Returns ``(lines, error)``.
+    """
+    lines = {}
+    for pk in row.get("product_ids") or []:
+        pk = _to_int(pk)
+        lines[pk] = lines.get(pk, 0) + 1
+    for item in row.get("items") or []:
+        pk = _to_int(item.get("product_id"))
+        quantity = _to_int(item.get("quantity", 1))
+        if quantity is None or quantity < 1:
+            return {}, f"Quantity must be positive: product {item.get('product_id')}"
+        lines[pk] = lines.get(pk, 0) + quantity
+    return lines, None
+
+
+# ===== Order Totals =====
+LINE_TOTAL = F("quantity") * F("unit_price")
+
+
+def order_total(order_id):
+    """Sum an order's line-item snapshots with one aggregate query."""
+    total = OrderItem.objects.filter(order_id=order_id).aggregate(
+        total=Sum(LINE_TOTAL)
+    )["total"]
+    return total or Decimal("0")
+
+
+def recompute_order_totals(orders=None):
+    """Rewrite total_amount for ``orders`` (default: all) in a single UPDATE.
+
+    The per-order sum is a correlated aggregate subquery over the line-item
+    snapshots, so the database does all the work, no order rows are loaded
+    into Python and current product prices are never consulted.
+    """
+    totals = (
+        OrderItem.objects.filter(order_id=OuterRef("pk"))
+        .values("order_id")
+        .annotate(total=Sum(LINE_TOTAL))
+        .values("total")
+    )
+    orders = Order.objects.all() if orders is None else orders
+    invalidate(Order)
+    return orders.update(total_amount=Coalesce(
+        Subquery(totals),
+        Value(Decimal("0")),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+
+
+# ===== Stock =====
+class InsufficientStock(Exception):
+    pass
+
+
+def reserve_stock(demand):
+    """Take ``demand`` ({product_id: quantity}) out of stock without locking.
+
+    Each chunk is one UPDATE ... SET stock = stock - <qty> guarded by
+    ``stock >= <qty>`` per product, so concurrent orders can never oversell.
+    If any product cannot cover its quantity the savepoint is rolled back and
+    InsufficientStock names the products that fell short.
+    """
+    demand = {pk: quantity for pk, quantity in demand.items() if quantity}
+    try:
+        with transaction.atomic():
+            for chunk in chunked(list(demand)):
+                guard = Q()
+                cases = []
+                for pk in chunk:
+                    guard |= Q(pk=pk, stock__gte=demand[pk])
+                    cases.append(When(pk=pk, then=F("stock") - demand[pk]))
+                new_stock = Case(*cases, output_field=PositiveIntegerField())
+                updated = Product.objects.filter(guard).update(stock=new_stock)
+                if updated != len(chunk):
+                    raise InsufficientStock
+            invalidate(Product)
+    except InsufficientStock:
+        short = [
+            str(pk) for pk, stock in
+            Product.objects.filter(pk__in=list(demand)).values_list("pk", "stock")
+            if stock < demand[pk]
+        ]
+        raise InsufficientStock(f"Insufficient stock for product(s): {', '.join(short)}") from None
+
+
+def restock_error(threshold, amount):
+    """Return why restock arguments are rejected, or None if they are valid."""
+    if amount <= 0:
+        return "Amount must be positive"
+    if threshold < 0:
+        return "Threshold cannot be negative"
+    return None
+
+
+def restock_low_stock(threshold=10, amount=10):
+    """Add ``amount`` to every product with stock below ``threshold``.
+
+    Runs as a single UPDATE ... SET stock = stock + %s WHERE stock < %s. Where
+    the backend supports UPDATE ... RETURNING (Postgres, SQLite 3.35+) the
+    updated rows come back from that same statement; elsewhere they are
+    selected by id inside the transaction. Returns the updated products.
+    Raises ValueError for arguments rejected by restock_error.
+    """
+    error = restock_error(threshold, amount)
+    if error:
+        raise ValueError(error)
+    table = connection.ops.quote_name(Product._meta.db_table)
+    if connection.vendor in ("postgresql", "sqlite") and connection.features.can_return_columns_from_insert:
+        with transaction.atomic():
+            invalidate(Product)
+            return list(Product.objects.raw(
+                f"UPDATE {table} SET stock = stock + %s WHERE stock < %s "
+                "RETURNING id, name, price, stock",
+                [amount, threshold],
+            ))
+
+    with transaction.atomic():
+        ids = list(
+            Product.objects.select_for_update()
+            .filter(stock__lt=threshold)
+            .values_list("pk", flat=True)
+        )
+        Product.objects.filter(pk__in=ids).update(stock=F("stock") + amount)
+        invalidate(Product)
+        return list(Product.objects.filter(pk__in=ids))
+
+
+# ===== Bulk Create Customers =====
+def bulk_create_customers(rows):
+    """Validate and insert customer rows in a handful of statements.
+
+    ``rows`` are mappings with ``name``, ``email`` and optional ``phone``.
+    Returns ``(customers, errors)`` where rejected rows are reported with the
+    same messages as CreateCustomer and the rest are still created.
+    """
+    rows = list(rows)
+    taken = existing_emails({row.get("email") for row in rows})
+
+    customers = []
+    errors = []
+    for row in rows:
+        name = row.get("name")
+        email = row.get("email")
+        phone = row.get("phone")
+        if not name:
+            errors.append(f"Name is required: {email}")
+            continue
+        if not email:
+            errors.append(f"Email is required: {name}")
+            continue
+        if email in taken:
+            errors.append(f"Email already exists: {email}")
+            continue
+        if phone and not PHONE_RE.match(phone):
+            errors.append(f"Invalid phone format: {phone}")
+            continue
+        taken.add(email)
+        customers.append(Customer(name=name, email=email, phone=phone))
+
+    customers = Customer.objects.bulk_create(customers, batch_size=QUERY_CHUNK_SIZE)
+    invalidate(Customer)
+    return customers, errors
+
+
+# ===== Bulk Create Products =====
+def bulk_create_products(rows):
+    """Validate and insert product rows with the same rules as CreateProduct.
+
+    Returns ``(products, errors)``.
+    """
+    products = []
+    errors = []
+    for row in rows:
+        name = row.get("name")
+        if not name:
+            errors.append(f"Name is required: {row}")
+            continue
+        try:
+            price = Decimal(str(row.get("price")))
+        except InvalidOperation:
+            errors.append(f"Invalid price for {name}: {row.get('price')}")
+            continue
+        stock = _to_int(row.get("stock") or 0)
+        if stock is None:
+            errors.append(f"Invalid stock for {name}: {row.get('stock')}")
+            continue
+        error = product_error(price, stock)
+        if error:
+            errors.append(f"{error}: {name}")
+            continue
+        products.append(Product(name=name, price=price, stock=stock))
+
+    products = Product.objects.bulk_create(products, batch_size=QUERY_CHUNK_SIZE)
+    invalidate(Product)
+    return products, errors
+
+
+# ===== Bulk Create Orders =====
+def bulk_create_orders(rows, reserve=True):
+    """Create orders and their line items without per-order queries.
+
+    ``rows`` are mappings with ``customer_id``, ``product_ids`` and/or
+    ``items`` (``product_id``/``quantity``) and optional ``order_date``.
+    Customers and products are resolved with one ``__in`` query per chunk,
+    totals are summed in memory from the fetched prices and orders plus
+    OrderItem rows are written with bulk_create. With ``reserve`` the stock
+    is allocated in memory in input order and then taken with reserve_stock().
+    Returns ``(orders, errors)``.
+    """
+    rows = list(rows)
+    customer_ids = {_to_int(row.get("customer_id")) for row in rows} - {None}
+    product_ids = set()
+    for row in rows:
+        product_ids.update(pk for pk in order_lines(row)[0] if pk is not None)
+
+    customers = set()
+    for chunk in chunked(list(customer_ids)):
+        customers.update(
+            Customer.objects.filter(pk__in=chunk).values_list("pk", flat=True)
+        )
+    prices = {}
+    available = {}
+    for chunk in chunked(list(product_ids)):
+        for pk, price, stock in Product.objects.filter(pk__in=chunk).values_list("pk", "price", "stock"):
+            prices[pk] = price
+            available[pk] = stock
+
+    demand = {}
+    orders = []
+    pending_lines = []
+    errors = []
+    for row in rows:
+        customer_id = _to_int(row.get("customer_id"))
+        if customer_id not in customers:
+            errors.append(f"Invalid customer ID: {row.get('customer_id')}")
+            continue
+        lines, error = order_lines(row)
+        if error:
+            errors.append(error)
+            continue
+        if not lines:
+            errors.append(f"At least one product ID is required: customer {customer_id}")
+            continue
+        missing = [str(pk) for pk in lines if pk not in prices]
+        if missing:
+            errors.append(f"One or more product IDs are invalid: {', '.join(missing)}")
+            continue
+        if reserve:
+            short = [str(pk) for pk, quantity in lines.items() if quantity > available[pk]]
+            if short:
+                errors.append(f"Insufficient stock for product(s): {', '.join(short)}")
+                continue
+            for pk, quantity in lines.items():
+                available[pk] -= quantity
+                demand[pk] = demand.get(pk, 0) + quantity
+        orders.append(Order(
+            customer_id=customer_id,
+            order_date=row.get("order_date") or timezone.now(),
+            total_amount=sum(prices[pk] * quantity for pk, quantity in lines.items()),
+        ))
+        pending_lines.append(lines)
+
+    reserve_stock(demand)
+    orders = Order.objects.bulk_create(orders, batch_size=QUERY_CHUNK_SIZE)
+    OrderItem.objects.bulk_create(
+        [
+            OrderItem(order_id=order.pk, product_id=pk, quantity=quantity, unit_price=prices[pk])
+            for order, lines in zip(orders, pending_lines)
+            for pk, quantity in lines.items()
+        ],
+        batch_size=QUERY_CHUNK_SIZE,
+    )
+    add_to_sales_rollup(
+        (order.order_date, {pk: (quantity, prices[pk]) for pk, quantity in lines.items()})
+        for order, lines in zip(orders, pending_lines)
+    )
+    invalidate(Order, OrderItem)
+    return orders, errors
+
+
+# ===== Sales Rollup =====
+def order_dates(orders):
+    """Distinct sales dates of ``orders``, computed by the database."""
+    return set(
+        orders.annotate(day=TruncDate("order_date"))
+        .order_by().values_list("day", flat=True).distinct()
+    )
+
+
+def mark_sales_dirty(dates):
+    """Queue ``dates`` for the reconcile task (re-marking refreshes marked_at)."""
+    DirtySalesDate.objects.bulk_create(
+        [DirtySalesDate(date=day, marked_at=timezone.now()) for day in set(dates)],
+        update_conflicts=True, unique_fields=["date"], update_fields=["marked_at"],
+    )
+
+
+def add_to_sales_rollup(orders):
+    """Add newly created orders to DailySalesRollup.
+
+    ``orders`` yields ``(order_date, {product_id: (quantity, unit_price)})``.
+    Deltas are summed in memory per (day, product) and per day total, the
+    missing rows are inserted empty with ignore_conflicts, then each chunk
+    of rows is bumped by one ``UPDATE ... SET units = units + CASE ...`` so
+    concurrent orders on the same day add up instead of overwriting each
+    other, in a number of queries that does not grow with the order lines.
+    Call inside the transaction that creates the orders.
+    """
+    deltas = {}
+    for order_date, lines in orders:
+        day = timezone.localdate(order_date)
+        total = deltas.setdefault((day, None), [0, Decimal("0"), 0])
+        total[2] += 1
+        for product_id, (quantity, unit_price) in lines.items():
+            delta = deltas.setdefault((day, product_id), [0, Decimal("0"), 0])
+            delta[0] += quantity
+            delta[1] += quantity * unit_price
+            delta[2] += 1
+            total[0] += quantity
+            total[1] += quantity * unit_price
+    if not deltas:
+        return
+
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(date=day, product_id=product_id) for day, product_id in deltas],
+        batch_size=QUERY_CHUNK_SIZE, ignore_conflicts=True,
+    )
+    days = sorted({day for day, _ in deltas})
+    products = sorted({product_id for _, product_id in deltas if product_id is not None})
+    ids = {}
+    for day_chunk in chunked(days):
+        for product_chunk in chunked(products) if products else [[]]:
+            rows = DailySalesRollup.objects.filter(date__in=day_chunk).filter(
+                Q(product__isnull=True) | Q(product_id__in=product_chunk)
+            )
+            for pk, day, product_id in rows.values_list("pk", "date", "product_id"):
+                if (day, product_id) in deltas:
+                    ids[(day, product_id)] = pk
+
+    # A row deleted meanwhile by a concurrent rebuild cannot be bumped; its
+    # day is left for the reconcile task instead.
+    missing = {day for day, product_id in deltas if (day, product_id) not in ids}
+    if missing:
+        mark_sales_dirty(missing)
+
+    for chunk in chunked(list(ids)):
+        figures = {}
+        for index, name in enumerate(("units", "revenue", "order_count")):
+            figures[name] = Case(
+                *[When(pk=ids[key], then=F(name) + deltas[key][index]) for key in chunk],
+                output_field=DailySalesRollup._meta.get_field(name),
+            )
+        DailySalesRollup.objects.filter(pk__in=[ids[key] for key in chunk]).update(**figures)
+    invalidate(DailySalesRollup)
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return Q(order__order_date__gte=start, order__order_date__lt=start + timedelta(days=1))
+
+
+def rebuild_sales_rollup(dates):
+    """Recompute the DailySalesRollup rows of ``dates`` from the order items.
+
+    Like add_to_sales_rollup this counts sold lines, so an order without
+    items is not part of any day's order_count.
+    """
+    dates = sorted(set(dates))
+    for chunk in chunked(dates, 50):
+        window = Q()
+        for day in chunk:
+            window |= _day_range(day)
+        items = OrderItem.objects.filter(window).annotate(day=TruncDate("order__order_date"))
+        figures = {
+            "units": Sum("quantity"),
+            "revenue": Sum(LINE_TOTAL),
+            "order_count": Count("order_id", distinct=True),
+        }
+        rows = [
+            DailySalesRollup(date=row["day"], product_id=row.get("product_id"), **{
+                name: row[name] for name in figures
+            })
+            for values in (("day", "product_id"), ("day",))
+            for row in items.values(*values).annotate(**figures).order_by()
+        ]
+        with transaction.atomic():
+            DailySalesRollup.objects.filter(date__in=chunk).delete()
+            DailySalesRollup.objects.bulk_create(rows, batch_size=QUERY_CHUNK_SIZE)
+            invalidate(DailySalesRollup)
+
+
+def reconcile_sales_rollup():
+    """Rebuild every dirty date, then clear the markers not re-set meanwhile."""
+    started = timezone.now()
+    dates = list(DirtySalesDate.objects.filter(marked_at__lte=started).values_list("date", flat=True))
+    rebuild_sales_rollup(dates)
+    DirtySalesDate.objects.filter(date__in=dates, marked_at__lte=started).delete()
+    return len(dates)
+
+
+SALES_ROLLUP_GROUPINGS = {
+    "week": TruncWeek("date", output_field=DateField()),
+    "month": TruncMonth("date", output_field=DateField()),
+}
+
+
+def sales_rollup(date_from=None, date_to=None, group_by="day"):
+    """Pre-aggregated sales between two dates (inclusive), as value dicts.
+
+    ``day``/``week``/``month`` sum the daily total rows; ``product`` sums the
+    per-product rows over the range, best sellers first.
+    """
+    rows = DailySalesRollup.objects.all()
+    if date_from:
+        rows = rows.filter(date__gte=date_from)
+    if date_to:
+        rows = rows.filter(date__lte=date_to)
+    figures = {
+        "units": Sum("units"),
+        "revenue": Sum("revenue"),
+        "order_count": Sum("order_count"),
+    }
+    if group_by == "product":
+        return (
+            rows.filter(product__isnull=False)
+            .values("product_id", "product__name")
+            .annotate(**figures)
+            .order_by("-revenue", "product_id")
+        )
+    rows = rows.filter(product__isnull=True)
+    bucket = SALES_ROLLUP_GROUPINGS.get(group_by)
+    if bucket is None:
+        return rows.values(*figures, period=F("date")).order_by("date")
+    return (
+        rows.annotate(period=bucket).values("period")
+        .annotate(**figures)
+        .values("period", *figures)
+        .order_by("period")
+    )
+
+
+# ===== Inactive Customers =====
+def inactive_customers(cutoff):
+    """Customers without an order on or after ``cutoff`` (one NOT EXISTS subquery)."""
+    recent = Order.objects.filter(customer=OuterRef("pk"), order_date__gte=cutoff)
+    return Customer.objects.filter(~Exists(recent))
+
+
+def count_inactive_customers(cutoff):
+    """What purge_inactive_customers(cutoff) would delete, without deleting it."""
+    customers = inactive_customers(cutoff)
+    return {
+        "customers": customers.count(),
+        "orders": Order.objects.filter(customer__in=customers).count(),
+        "items": OrderItem.objects.filter(order__customer__in=customers).count(),
+    }
+
+
+def purge_inactive_customers(cutoff, chunk_size=QUERY_CHUNK_SIZE):
+    """Delete inactive customers with their orders, one id range at a time.
+
+    A generator: each chunk takes the next ``chunk_size`` candidate ids and,
+    in its own transaction, deletes the order items, orders and customers in
+    that id range with three set-based DELETEs that re-check NOT EXISTS, so
+    a customer who ordered since the ids were read is kept. Nothing is
+    loaded into Python and no per-object signals are sent; the response
+    cache is invalidated per chunk instead. Yields the rows deleted by each
+    committed chunk, which is where the caller can pause to free the lock.
+    """
+    using = Customer.objects.db
+    last = 0
+    while True:
+        ids = list(
+            inactive_customers(cutoff).filter(pk__gt=last)
+            .order_by("pk").values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        last = ids[-1]
+        with transaction.atomic(using=using):
+            customers = inactive_customers(cutoff).filter(pk__range=(ids[0], last))
+            orders = Order.objects.filter(customer__in=customers.values("pk"))
+            mark_sales_dirty(order_dates(orders))
+            deleted = {
+                "items": OrderItem.objects.filter(order__in=orders.values("pk"))._raw_delete(using),
+                "orders": orders._raw_delete(using),
+                "customers": customers._raw_delete(using),
+            }
+            invalidate(Customer, Order, OrderItem)
+        yield deleted
+
+
+# ===== Order Reminders =====
+def recent_orders(since):
+    """Orders placed at or after ``since``; the window is an order_date index range."""
+    return Order.objects.filter(order_date__gte=since)
+
+
+def orders_pending_reminder(since):
+    """Recent orders whose customer has not been reminded about them yet."""
+    return recent_orders(since).filter(reminder_sent_at__isnull=True)
+
+
+def pending_reminders(since, chunk_size=2000):
+    """Yield ``(email, [order ids])`` once per customer with orders pending a reminder.
+
+    Customers are paged by id, ``chunk_size`` at a time, and each page's
+    ``(customer_id, email, order id)`` rows are read in full before the
+    first yield. No cursor stays open between yields, so the caller can
+    mark orders as it goes, and memory stays bounded by the page however
+    large the window is.
+    """
+    pending = orders_pending_reminder(since)
+    last = None
+    while True:
+        page = pending if last is None else pending.filter(customer_id__gt=last)
+        customer_ids = list(
+            page.order_by("customer_id").values_list("customer_id", flat=True).distinct()[:chunk_size]
+        )
+        if not customer_ids:
+            return
+        last = customer_ids[-1]
+        rows = list(
+            pending.filter(customer_id__gte=customer_ids[0], customer_id__lte=last)
+            .order_by("customer_id", "pk")
+            .values_list("customer_id", "customer__email", "pk")
+        )
+        for (_, email), group in groupby(rows, key=itemgetter(0, 1)):
+            yield email, [pk for _, _, pk in group]
+
+
+def mark_reminded(order_ids, when=None):
+    """Record that the reminders for ``order_ids`` were sent."""
+    when = when or timezone.now()
+    order_ids = list(order_ids)
+    updated = 0
+    for chunk in chunked(order_ids):
+        updated += Order.objects.filter(
+            pk__in=chunk, reminder_sent_at__isnull=True
+        ).update(reminder_sent_at=when)
+    if updated:
+        invalidate(Order)
+    return updated
+
+
+def send_order_reminders(since, notify, chunk_size=2000):
+    """Call ``notify(email, order_ids)`` once per customer pending a reminder.
+
+    Only orders without ``reminder_sent_at`` are selected, and each
+    customer's orders are marked as soon as ``notify`` returns, so a run
+    that is killed part way resends at most the customer it was on.
+    Returns the number of customers notified.
+    """
+    customers = 0
+    for email, order_ids in pending_reminders(since, chunk_size):
+        notify(email, order_ids)
+        mark_reminded(order_ids)
+        customers += 1
+    return customers
+
+
+# ===== Reporting =====
+CENTS = Decimal("0.01")
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS)
+
+
+def _average(revenue, count):
+    if not count:
+        return _money(0)
+    return _money(revenue / count)
+
+
+class CrmStats:
+    """Aggregates over a filtered order queryset, each computed on first use.
+
+    All figures come from COUNT/SUM in the database; nothing is summed in
+    Python, so the cost does not grow with the number of orders transferred.
+    """
+
+    GROUPINGS = {
+        "day": TruncDate("order_date"),
+        "week": TruncWeek("order_date", output_field=DateField()),
+    }
+
+    def __init__(self, orders, group_by=None):
+        self.orders = orders
+        self.group_by = group_by
+
+    def _aggregate_totals(self):
+        return {
+            "order_count": Count("pk"),
+            "active_customer_count": Count("customer", distinct=True),
+            "revenue": Sum("total_amount"),
+        }
+
+    @cached_property
+    def totals(self):
+        totals = self.orders.aggregate(**self._aggregate_totals())
+        totals["revenue"] = _money(totals["revenue"])
+        return totals
+
+    @cached_property
+    def customer_count(self):
+        return Customer.objects.count()
+
+    @property
+    def active_customer_count(self):
+        return self.totals["active_customer_count"]
+
+    @property
+    def order_count(self):
+        return self.totals["order_count"]
+
+    @property
+    def revenue(self):
+        return self.totals["revenue"]
+
+    @property
+    def average_order_value(self):
+        return _average(self.revenue, self.order_count)
+
+    def group_rows(self):
+        """Values queryset for ``group_by``, or None when not grouping."""
+        if self.group_by == "product":
+            return (
+                OrderItem.objects.filter(order__in=self.orders.values("pk"))
+                .values("product_id", "product__name")
+                .annotate(
+                    order_count=Count("order", distinct=True),
+                    units=Sum("quantity"),
+                    revenue=Sum(LINE_TOTAL),
+                )
+                .order_by("-revenue")
+            )
+
+        bucket = self.GROUPINGS.get(self.group_by)
+        if bucket is None:
+            return None
+        return (
+            self.orders.annotate(bucket=bucket)
+            .values("bucket")
+            .annotate(order_count=Count("pk"), revenue=Sum("total_amount"))
+            .order_by("bucket")
+        )
+
+    def buckets(self, rows):
+        if self.group_by == "product":
+            return [
+                {
+                    "key": row["product__name"],
+                    "product_id": row["product_id"],
+                    "order_count": row["order_count"],
+                    "units": row["units"],
+                    "revenue": _money(row["revenue"]),
+                    "average_order_value": _average(row["revenue"], row["order_count"]),
+                }
+                for row in rows
+            ]
+        return [
+            {
+                "key": row["bucket"].isoformat(),
+                "order_count": row["order_count"],
+                "revenue": _money(row["revenue"]),
+                "average_order_value": _average(row["revenue"], row["order_count"]),
+            }
+            for row in rows
+        ]
+
+    @cached_property
+    def groups(self):
+        rows = self.group_rows()
+        return [] if rows is None else self.buckets(rows)
+
+    async def aevaluate(self, fields):
+        """Compute the selected ``fields`` up front with the async ORM.
+
+        Used by the async GraphQL view, where the lazy properties above
+        cannot run their queries on the event loop.
+        """
+        if fields & {"order_count", "active_customer_count", "revenue", "average_order_value"}:
+            totals = await self.orders.aaggregate(**self._aggregate_totals())
+            totals["revenue"] = _money(totals["revenue"])
+            self.__dict__["totals"] = totals
+        if "customer_count" in fields:
+            self.__dict__["customer_count"] = await Customer.objects.acount()
+        if "groups" in fields:
+            rows = self.group_rows()
+            self.__dict__["groups"] = [] if rows is None else self.buckets([row async for row in rows])
+        return self
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from celery.schedules import crontab
 
@@ -80,13 +81,81 @@ WSGI_APPLICATION = 'alx_backend_graphql.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite (db.sqlite3) by default, tuned on connect by crm.signals
+# (WAL, busy_timeout, synchronous=NORMAL; see SQLITE_PRAGMAS). Set
+# CRM_DB_ENGINE=postgresql and the CRM_DB_* variables for Postgres:
+# connections persist for CRM_DB_CONN_MAX_AGE seconds, or come from a
+# psycopg pool of CRM_DB_POOL_MIN..CRM_DB_POOL_MAX connections when
+# CRM_DB_POOL_MAX is set. CRM_DB_REPLICAS (comma-separated hosts) adds
+# read replicas, which crm.routers uses for GraphQL queries.
+
+if os.environ.get('CRM_DB_ENGINE', 'sqlite') == 'postgresql':
+    primary = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('CRM_DB_NAME', 'crm'),
+        'USER': os.environ.get('CRM_DB_USER', ''),
+        'PASSWORD': os.environ.get('CRM_DB_PASSWORD', ''),
+        'HOST': os.environ.get('CRM_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('CRM_DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('CRM_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
+    if os.environ.get('CRM_DB_POOL_MAX'):
+        # A pool replaces persistent connections; Django requires CONN_MAX_AGE 0.
+        primary['CONN_MAX_AGE'] = 0
+        primary['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('CRM_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ['CRM_DB_POOL_MAX']),
+        }
+    DATABASES = {'default': primary}
+    for number, host in enumerate(filter(None, os.environ.get('CRM_DB_REPLICAS', '').split(',')), 1):
+        DATABASES[f'replica_{number}'] = dict(
+            primary, HOST=host.strip(), OPTIONS=dict(primary['OPTIONS']), TEST={'MIRROR': 'default'}
+        )
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('CRM_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so concurrent
+                # mutations wait on busy_timeout instead of failing to upgrade.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
 }
 
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['crm.routers.PrimaryReplicaRouter'] if DATABASE_REPLICAS else []
+
+
+# Cache
+# Local memory by default; set CRM_CACHE_URL (e.g. redis://localhost:6379/1)
+# to share persisted queries and cached responses between processes.
+
+if os.environ.get('CRM_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CRM_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'crm',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,7 +198,40 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 GRAPHENE = {
-    'SCHEMA': 'alx_backend_graphql.schema.schema'
+    'SCHEMA': 'alx_backend_graphql.schema.schema',
+    # Largest first/last a connection accepts (also the default page size).
+    'RELAY_CONNECTION_MAX_LIMIT': 100,
+}
+
+# Pre-execution query cost limits (crm/cost.py). Cost is the estimated number
+# of rows touched; lists that are not connections count DEFAULT_LIST_SIZE rows.
+GRAPHQL_QUERY_COST = {
+    'MAX_COST': 20000,
+    'MAX_DEPTH': 6,
+    'DEFAULT_LIST_SIZE': 20,
+}
+
+# Parsed + validated GraphQL documents kept per process (crm/documents.py).
+GRAPHQL_DOCUMENT_CACHE_SIZE = 512
+
+# Addresses allowed to read /metrics and /graphql/cache without a staff
+# login (crm/views.py), e.g. the Prometheus scraper. Behind a reverse proxy
+# REMOTE_ADDR is the proxy itself, so do not route those paths publicly.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('CRM_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip
+]
+
+# Opt-in query result cache (crm/response_cache.py): only queries whose root
+# fields are all listed here are cached, and model writes invalidate them.
+# Invalidations only reach processes that share the cache, so it is enabled
+# only with CRM_CACHE_URL: with per-process locmem, writes made by another
+# worker or by cron/Celery would go unseen until TIMEOUT.
+GRAPHQL_RESPONSE_CACHE = {
+    'TIMEOUT': 60,
+    'FIELDS': (
+        ['allProducts', 'allCustomers', 'crmStats', 'salesRollup', 'search']
+        if os.environ.get('CRM_CACHE_URL') else []
+    ),
 }
 CRONJOBS = [
     ('*/5 * * * *', 'crm.cron.log_crm_heartbeat'),
@@ -147,4 +249,8 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'crm.tasks.generate_crm_report',
         'schedule': crontab(day_of_week='mon', hour=6, minute=0),
     },
+    'reconcile-sales-rollup': {
+        'task': 'crm.tasks.reconcile_sales_rollup',
+        'schedule': crontab(minute='*/15'),
+    },
 }
\ No newline at end of file
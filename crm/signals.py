@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Customer, Order, OrderItem, Product
+from .response_cache import invalidate
+from .search import install_search_indexes, install_trigram_indexes
+from .services import mark_sales_dirty, order_dates, order_total, recompute_order_totals
+
+
+# ===== Database Connections =====
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection.
+
+    WAL lets readers work while a mutation writes, busy_timeout makes a
+    second writer wait for the lock instead of failing at once, and
+    synchronous=NORMAL only syncs the WAL on checkpoints.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+# ===== Order Totals =====
+@receiver(m2m_changed, sender=Order.products.through)
+def sync_order_totals(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Order.total_amount in step with Order.products changes."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            instance.total_amount = order_total(instance.pk)
+            Order.objects.filter(pk=instance.pk).update(total_amount=instance.total_amount)
+        return
+
+    # product.orders.add/remove/clear(): the affected orders are in pk_set,
+    # except for clear() where they have to be captured before the delete.
+    if action == "pre_clear":
+        instance._cleared_order_ids = list(
+            sender.objects.filter(product_id=instance.pk).values_list("order_id", flat=True)
+        )
+    elif action == "post_clear":
+        order_ids = getattr(instance, "_cleared_order_ids", [])
+        recompute_order_totals(Order.objects.filter(pk__in=order_ids))
+    elif action in ("post_add", "post_remove") and pk_set:
+        recompute_order_totals(Order.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=OrderItem)
+def sync_order_total_on_item_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recompute_order_totals(Order.objects.filter(pk=instance.order_id))
+
+
+@receiver(post_delete, sender=OrderItem)
+def sync_order_total_on_item_delete(sender, instance, origin=None, **kwargs):
+    # Items cascading from an order delete have no order left to update.
+    if isinstance(origin, Order) or (isinstance(origin, QuerySet) and origin.model is Order):
+        return
+    recompute_order_totals(Order.objects.filter(pk=instance.order_id))
+
+
+# ===== Response Cache =====
+# Writes that bypass signals (bulk_create, update(), raw SQL) call
+# invalidate() themselves in crm/services.py.
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_cached_responses(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate(sender)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(m2m_changed, sender=Order.products.through)
+def invalidate_cached_order_items(sender, raw=False, action=None, **kwargs):
+    # Line items change order totals too.
+    if not raw and action in (None, "post_add", "post_remove", "post_clear"):
+        invalidate(Order, OrderItem)
+
+
+# ===== Sales Rollup =====
+# Order creation through crm/services.py adds to the rollup directly; any
+# other change to orders or line items marks the affected days dirty for
+# the reconcile_sales_rollup task.
+@receiver(pre_save, sender=Order)
+def mark_sales_date_moved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None or (update_fields is not None and "order_date" not in update_fields):
+        return
+    mark_sales_dirty(order_dates(Order.objects.filter(pk=instance.pk)))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_sales_date_on_order(sender, instance, raw=False, created=False, **kwargs):
+    # A new order has no items yet; they arrive through the paths below.
+    if not raw and not created:
+        mark_sales_dirty([timezone.localdate(instance.order_date)])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def mark_sales_date_on_item(sender, instance, raw=False, origin=None, **kwargs):
+    # Cascades from an order delete are covered by the order's own signal.
+    if raw or isinstance(origin, Order) or (isinstance(origin, QuerySet) and origin.model is Order):
+        return
+    mark_sales_dirty(order_dates(Order.objects.filter(pk=instance.order_id)))
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def mark_sales_date_on_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        orders = Order.objects.filter(pk=instance.pk)
+    elif action == "post_clear":
+        orders = Order.objects.filter(pk__in=getattr(instance, "_cleared_order_ids", []))
+    else:
+        orders = Order.objects.filter(pk__in=pk_set or ())
+    mark_sales_dirty(order_dates(orders))
+
+
+# ===== Search Indexes =====
+@receiver(post_migrate)
+def ensure_search_indexes(sender, using="default", **kwargs):
+    """Re-create trigram and full-text triggers that SQLite table rebuilds may have dropped.
+
+    Django rebuilds a SQLite table for most ALTERs, which silently discards
+    its triggers; the FTS5 rows themselves survive because ids are kept.
+    Only the indexes whose migration is applied are touched, so migrating
+    backwards does not bring dropped ones back. Postgres indexes are not
+    affected by table rebuilds.
+    """
+    connection = connections[using]
+    if sender.name != "crm" or connection.vendor != "sqlite":
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    with connection.schema_editor() as schema_editor:
+        if ("crm", "0005_filter_indexes") in applied:
+            install_trigram_indexes(schema_editor, rebuild=False)
+        if ("crm", "0008_search_indexes") in applied:
+            install_search_indexes(schema_editor, rebuild=False)
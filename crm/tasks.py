@@ -1,41 +1,35 @@
 from datetime import datetime
-import requests
 from celery import shared_task
-import json
 
-@shared_task
-def generate_crm_report():
-    # Example GraphQL query
-    query = """
-    {
-        allCustomers {
-            totalCount
-        }
-        allOrders {
-            totalCount
-            edges {
-                node {
-                    totalAmount
-                }
-            }
-        }
-    }
-    """
+from crm.executor import execute
+from crm.services import reconcile_sales_rollup as reconcile_dirty_dates
 
-    response = requests.post(
-        "http://localhost:8000/graphql/",
-        json={"query": query},
-        headers={"Content-Type": "application/json"},
-    )
+# Counts and revenue are aggregated by the database (crmStats), so the
+# report never downloads every order to sum it here.
+REPORT_QUERY = """
+{
+    crmStats {
+        customerCount
+        orderCount
+        revenue
+    }
+}
+"""
 
-    data = response.json()
-    customers = data.get("data", {}).get("allCustomers", {}).get("totalCount", 0)
-    orders = data.get("data", {}).get("allOrders", {}).get("totalCount", 0)
-    revenue = sum(
-        edge["node"]["totalAmount"] for edge in data.get("data", {}).get("allOrders", {}).get("edges", [])
-    )
+@shared_task
+def generate_crm_report():
+    stats = execute(REPORT_QUERY)["crmStats"]
+    customers = stats["customerCount"]
+    orders = stats["orderCount"]
+    revenue = stats["revenue"]
 
     log_entry = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Report: {customers} customers, {orders} orders, {revenue} revenue\n"
 
     with open("/tmp/crm_report_log.txt", "a") as f:
         f.write(log_entry)
+
+
+@shared_task
+def reconcile_sales_rollup():
+    # Rebuilds only the days marked dirty since the last run.
+    return reconcile_dirty_dates()
@@ -1,3 +1,589 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import ANY, patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import ProtectedError
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import parse
+
+from crm import response_cache
+from crm.documents import document_cache, query_hash
+from crm.executor import backend, get_schema
+from crm.models import Customer, DailySalesRollup, DirtySalesDate, Order, OrderItem, Product
+from crm.routers import PrimaryReplicaRouter, use_replicas
+from crm.search import SEARCH_CANDIDATES, ranked_ids, search
+from crm.services import (
+    InsufficientStock, bulk_create_orders, mark_sales_dirty, order_dates, rebuild_sales_rollup,
+    reconcile_sales_rollup, reserve_stock, restock_low_stock, send_order_reminders,
+)
+from crm.views import database_routing
+
+# ===== Query Count Regression Tests =====
+# Each representative operation runs against seeded data at two sizes; its
+# SQL query count must be the same at both, so an N+1 (a query per order,
+# item or input row) fails here instead of in production. The run at the
+# larger size must also stay within a generous wall-time budget.
+
+SMALL = {"customers": 5, "products": 5, "orders": 10}
+LARGE = {"customers": 40, "products": 40, "orders": 60}
+
+
+class QueryCountTests(TestCase):
+    time_budget = 1.0  # seconds, per operation at the larger size
+
+    def seed(self, size, seed):
+        call_command("generate_load_data", seed=seed, days=30, stdout=StringIO(), **size)
+        Product.objects.update(stock=1000)
+
+    def execute(self, query, variables=None):
+        document = backend.document_from_string(get_schema(), query)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = document.execute(context_value=SimpleNamespace(), variable_values=variables)
+            elapsed = time.perf_counter() - start
+        self.assertIsNone(result.errors)
+        return result.data, len(queries), elapsed
+
+    def assertConstantQueries(self, query, variables=lambda size: None):
+        """Run ``query`` after seeding SMALL, then after growing to LARGE.
+
+        ``variables`` builds the variables for a size, so mutations can
+        send inputs that grow with the data.
+        """
+        self.seed(SMALL, seed=1)
+        _, small_count, _ = self.execute(query, variables(SMALL))
+        self.seed({key: LARGE[key] - SMALL[key] for key in LARGE}, seed=2)
+        data, large_count, elapsed = self.execute(query, variables(LARGE))
+        self.assertEqual(
+            small_count, large_count,
+            f"query count grew from {small_count} to {large_count} with the data size",
+        )
+        self.assertLess(elapsed, self.time_budget, f"took {elapsed:.3f}s")
+        return data
+
+    def customer_ids(self, count):
+        return [str(pk) for pk in Customer.objects.order_by("pk").values_list("pk", flat=True)[:count]]
+
+    def product_ids(self, count):
+        return [str(pk) for pk in Product.objects.order_by("pk").values_list("pk", flat=True)[:count]]
+
+    def test_nested_order_list(self):
+        data = self.assertConstantQueries(
+            "query { allOrders(first: 100) { totalCount edges { node { id totalAmount "
+            "customer { name email } items { quantity unitPrice product { name price } } } } } }"
+        )
+        self.assertEqual(data["allOrders"]["totalCount"], LARGE["orders"])
+
+    def test_order_line_totals(self):
+        # line_total is a property; the columns it reads must still be loaded.
+        self.assertConstantQueries("query { allOrders(first: 100) { edges { node { items { lineTotal } } } } }")
+
+    def test_customer_orders(self):
+        self.assertConstantQueries(
+            "query { allCustomers(first: 100) { edges { node { name "
+            "orders { edges { node { totalAmount items { quantity } } } } } } } }"
+        )
+
+    def test_keyset_order_page(self):
+        self.assertConstantQueries(
+            "query { allOrdersKeyset(first: 100) { edges { node { id customer { name } "
+            "items { quantity product { name } } } } } }"
+        )
+
+    def test_filtered_customer_search(self):
+        self.assertConstantQueries(
+            'query { allCustomers(first: 100, email: "load-") { totalCount edges { node { id name email } } } }'
+        )
+
+    def test_product_filter(self):
+        self.assertConstantQueries(
+            'query { allProducts(first: 100, price_Gte: "1", stock_Gte: "1") { edges { node { id name price } } } }'
+        )
+
+    def test_stats_by_product(self):
+        self.assertConstantQueries(
+            "query { crmStats(groupBy: PRODUCT) { orderCount revenue groups { productId units revenue } } }"
+        )
+
+    def test_bulk_create_customers(self):
+        data = self.assertConstantQueries(
+            "mutation($input: [CustomerInput]!) { bulkCreateCustomers(input: $input) { customers { id } errors } }",
+            lambda size: {"input": [
+                {"name": f"Bulk {i}", "email": f"bulk-{size['customers']}-{i}@example.com"}
+                for i in range(size["customers"])
+            ]},
+        )
+        self.assertEqual(len(data["bulkCreateCustomers"]["customers"]), LARGE["customers"])
+
+    def test_bulk_create_orders(self):
+        def orders(size):
+            customers = self.customer_ids(size["customers"])
+            products = self.product_ids(size["products"])
+            return {"input": [
+                {"customerId": customers[i % len(customers)], "items": [
+                    {"productId": products[i % len(products)], "quantity": 2},
+                    {"productId": products[(i + 1) % len(products)]},
+                ]}
+                for i in range(size["orders"])
+            ]}
+
+        data = self.assertConstantQueries(
+            "mutation($input: [OrderInput]!) { bulkCreateOrders(input: $input) "
+            "{ orders { id totalAmount items { quantity } } errors } }",
+            orders,
+        )
+        self.assertEqual(data["bulkCreateOrders"]["errors"], [])
+        self.assertEqual(len(data["bulkCreateOrders"]["orders"]), LARGE["orders"])
+
+    def test_create_order_with_many_items(self):
+        self.assertConstantQueries(
+            "mutation($customer: ID!, $items: [OrderItemInput]) { createOrder(input: "
+            "{customerId: $customer, items: $items}) { order { id items { product { name } } } } }",
+            lambda size: {
+                "customer": self.customer_ids(1)[0],
+                "items": [{"productId": pk, "quantity": 1} for pk in self.product_ids(size["products"])],
+            },
+        )
+
+    def test_search(self):
+        data = self.assertConstantQueries(
+            'query { search(term: "load", types: [ORDER], first: 20) { type rank node { '
+            "... on OrderType { totalAmount customer { name } items { quantity } } } } }"
+        )
+        self.assertEqual(len(data["search"]), 20)
+
+
+# ===== Async View Tests =====
+# The same operations through AsyncCRMGraphQLView, whose connection fields
+# and loaders take the async ORM paths.
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        call_command("generate_load_data", seed=1, days=30, stdout=StringIO(), **SMALL)
+        Product.objects.update(stock=1000)
+
+    async def post(self, query, variables=None):
+        response = await AsyncClient().post(
+            "/graphql/async", {"query": query, "variables": variables}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertNotIn("errors", body)
+        return body["data"]
+
+    async def test_nested_query(self):
+        data = await self.post(
+            "query { allOrders(first: 100) { totalCount edges { node { id customer { name } "
+            "items { quantity product { name } } } } } }"
+        )
+        self.assertEqual(data["allOrders"]["totalCount"], SMALL["orders"])
+        self.assertEqual(len(data["allOrders"]["edges"]), SMALL["orders"])
+        for edge in data["allOrders"]["edges"]:
+            self.assertTrue(edge["node"]["customer"]["name"])
+
+    async def test_mutation(self):
+        customer = await Customer.objects.order_by("pk").afirst()
+        product = await Product.objects.order_by("pk").afirst()
+        data = await self.post(
+            "mutation($customer: ID!, $product: ID!) { createOrder(input: {customerId: $customer, "
+            "items: [{productId: $product, quantity: 2}]}) { order { id items { quantity product { name } } } } }",
+            {"customer": str(customer.pk), "product": str(product.pk)},
+        )
+        items = data["createOrder"]["order"]["items"]
+        self.assertEqual(items, [{"quantity": 2, "product": {"name": product.name}}])
+
+    async def test_cache_lookups_run_off_the_event_loop(self):
+        on_loop = []
+
+        def recording(function):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(True)
+                except RuntimeError:
+                    on_loop.append(False)
+                return function(*args, **kwargs)
+            return wrapper
+
+        query = "query { allProducts(first: 5) { edges { node { name } } } }"
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+        with (
+            self.settings(GRAPHQL_RESPONSE_CACHE={"TIMEOUT": 60, "FIELDS": ["allProducts"]}),
+            patch.object(response_cache, "get_response", recording(response_cache.get_response)),
+            patch.object(response_cache, "set_response", recording(response_cache.set_response)),
+            patch.object(document_cache, "register_persisted", recording(document_cache.register_persisted)),
+            patch.object(document_cache, "get_persisted", recording(document_cache.get_persisted)),
+        ):
+            response = await AsyncClient().post(
+                "/graphql/async", {"query": query, "extensions": extensions}, content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+            response = await AsyncClient().post(
+                "/graphql/async", {"extensions": extensions}, content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(on_loop), 5)
+        self.assertNotIn(True, on_loop)
+
+
+# ===== Order Reminder Tests =====
+class OrderReminderTests(TestCase):
+    def setUp(self):
+        call_command("generate_load_data", seed=1, days=30, stdout=StringIO(), **SMALL)
+        self.since = timezone.now() - timedelta(days=60)
+
+    def test_every_customer_reminded_once(self):
+        sent = []
+        customers = send_order_reminders(self.since, lambda email, ids: sent.append(ids), chunk_size=2)
+        self.assertEqual(customers, Order.objects.values("customer").distinct().count())
+        self.assertCountEqual([pk for ids in sent for pk in ids], Order.objects.values_list("pk", flat=True))
+        self.assertEqual(send_order_reminders(self.since, lambda email, ids: sent.append(ids)), 0)
+
+    def test_customers_marked_as_they_are_notified(self):
+        # What a run killed during this notify() would leave behind.
+        sent = []
+
+        def notify(email, ids):
+            reminded = Order.objects.filter(reminder_sent_at__isnull=False).values_list("pk", flat=True)
+            self.assertCountEqual(reminded, [pk for done in sent for pk in done])
+            sent.append(ids)
+
+        send_order_reminders(self.since, notify, chunk_size=2)
+        self.assertGreater(len(sent), 2)
+
+
+# ===== Search Tests =====
+class SearchTests(TestCase):
+    def customer(self, name, email):
+        return Customer.objects.create(name=name, email=email)
+
+    def found(self, term, kind="customer"):
+        return [hit["node"].pk for hit in search(term, [kind])]
+
+    def test_prefix_match(self):
+        customer = self.customer("Margaret Hale", "mhale@example.com")
+        self.assertEqual(self.found("marg"), [customer.pk])
+        self.assertEqual(self.found("hale marg"), [customer.pk])
+        self.assertEqual(self.found("argaret"), [])
+
+    def test_name_match_outranks_email_match(self):
+        by_email = self.customer("John Smith", "thornton@example.com")
+        by_name = self.customer("John Thornton", "jt@example.com")
+        self.assertEqual(self.found("thornton"), [by_name.pk, by_email.pk])
+
+    def test_old_exact_match_beats_newer_prefix_matches(self):
+        old = self.customer("Ann Lee", "lee@example.com")
+        Customer.objects.bulk_create(
+            Customer(name=f"Annabel {i}", email=f"annabel-{i}@example.com")
+            for i in range(SEARCH_CANDIDATES + 50)
+        )
+        self.assertEqual(self.found("ann")[0], old.pk)
+
+    def test_index_follows_update_and_delete(self):
+        customer = self.customer("Margaret Hale", "mhale@example.com")
+        Customer.objects.filter(pk=customer.pk).update(name="Edith Shaw")
+        self.assertEqual(ranked_ids("customer", ["edith"], 10), [(customer.pk, ANY)])
+        self.assertEqual(ranked_ids("customer", ["margaret"], 10), [])
+        Customer.objects.filter(pk=customer.pk).delete()
+        self.assertEqual(ranked_ids("customer", ["edith"], 10), [])
+
+    def test_single_digit_order_id(self):
+        order = Order.objects.create(pk=1, customer=self.customer("Margaret Hale", "mhale@example.com"))
+        self.assertEqual(self.found("1", "order"), [order.pk])
+        self.assertEqual(self.found("1"), [])
+
+
+# ===== Query Cost Tests =====
+NESTED_ORDERS = (
+    "allCustomers(first: 100) { edges { node { name "
+    "orders(first: 100) { edges { node { items { quantity product { name } } } } } } } }"
+)
+
+
+class QueryCostTests(TestCase):
+    def post(self, query):
+        response = Client().post("/graphql", {"query": query}, content_type="application/json")
+        return response.json()
+
+    def assertRejected(self, query, message):
+        body = self.post(query)
+        self.assertIsNone(body.get("data"))
+        self.assertIn(message, body["errors"][0]["message"])
+
+    def test_expensive_query_is_rejected(self):
+        self.assertRejected(f"query {{ {NESTED_ORDERS} }}", "exceeds the maximum")
+
+    def test_negative_page_cannot_offset_cost(self):
+        self.assertRejected(
+            f"query {{ {NESTED_ORDERS} x: allProducts(first: -1000000) {{ edges {{ node {{ name }} }} }} }}",
+            "first on allProducts must not be negative",
+        )
+
+    def test_negative_page_arguments_are_rejected(self):
+        for argument in ("first: -1", "last: -1", "offset: -5"):
+            with self.subTest(argument=argument):
+                self.assertRejected(
+                    f"query {{ allProducts({argument}) {{ edges {{ node {{ name }} }} }} }}",
+                    "must not be negative",
+                )
+
+
+# ===== Internal Endpoint Tests =====
+class InternalEndpointTests(TestCase):
+    def test_metrics_allowed_from_listed_address(self):
+        for path in ("/metrics", "/graphql/cache"):
+            with self.subTest(path=path):
+                self.assertEqual(Client(REMOTE_ADDR="127.0.0.1").get(path).status_code, 200)
+
+    def test_metrics_forbidden_elsewhere(self):
+        for path in ("/metrics", "/graphql/cache"):
+            with self.subTest(path=path):
+                self.assertEqual(Client(REMOTE_ADDR="203.0.113.9").get(path).status_code, 403)
+
+
+# ===== Replica Routing Tests =====
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTests(SimpleTestCase):
+    # Not TestCase: its wrapping transaction would keep every read on the primary.
+    databases = {"default"}
+    router = PrimaryReplicaRouter()
+
+    def routed(self, query):
+        with database_routing(parse(query), None):
+            return self.router.db_for_read(Order)
+
+    def test_reads_default_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Order), "default")
+
+    def test_only_queries_use_replicas(self):
+        self.assertEqual(self.routed("query { allOrders { totalCount } }"), "replica_1")
+        self.assertEqual(self.routed("mutation { updateLowStockProducts { success } }"), "default")
+
+    def test_transactions_stay_on_primary(self):
+        with use_replicas(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Order), "default")
+
+
+# ===== Order History Tests =====
+class OrderHistoryTests(TestCase):
+    def test_product_with_order_lines_cannot_be_deleted(self):
+        customer = Customer.objects.create(name="Margaret Hale", email="mhale@example.com")
+        kept, sold = Product.objects.bulk_create([
+            Product(name="Kettle", price=Decimal("20.00")), Product(name="Toaster", price=Decimal("5.00")),
+        ])
+        order = Order.objects.create(customer=customer)
+        OrderItem.objects.create(order=order, product=kept, quantity=1, unit_price=Decimal("20.00"))
+        OrderItem.objects.create(order=order, product=sold, quantity=1, unit_price=Decimal("5.00"))
+        with self.assertRaises(ProtectedError):
+            sold.delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal("25.00"))
+        self.assertEqual(order.items.count(), 2)
+
+
+# ===== Import Tests =====
+class ImportTests(TestCase):
+    def test_malformed_lines_are_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "customers.ndjson")
+            with open(path, "w") as f:
+                f.write('{"name": "A One", "email": "a1@example.com"}\n{bad json\n[1, 2]\n')
+                f.write('{"name": "B Two", "email": "b2@example.com"}\n')
+            stderr = StringIO()
+            call_command("import_crm", "customers", path, batch_size=2, stdout=StringIO(), stderr=stderr)
+            self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+        self.assertCountEqual(Customer.objects.values_list("name", flat=True), ["A One", "B Two"])
+        self.assertIn("Invalid JSON at byte 45", stderr.getvalue())
+        self.assertIn("Not a JSON object at byte 55", stderr.getvalue())
+
+
+# ===== Stock Tests =====
+class StockTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Margaret Hale", email="mhale@example.com")
+        self.kettle, self.toaster = Product.objects.bulk_create([
+            Product(name="Kettle", price=Decimal("20.00"), stock=3),
+            Product(name="Toaster", price=Decimal("5.00"), stock=10),
+        ])
+
+    def stock(self):
+        return dict(Product.objects.values_list("name", "stock"))
+
+    def test_order_exceeding_stock_leaves_stock_unchanged(self):
+        result = Client().post("/graphql", {
+            "query": "mutation($customer: ID!, $items: [OrderItemInput]) { createOrder(input: "
+                     "{customerId: $customer, items: $items}) { order { id } } }",
+            "variables": {"customer": str(self.customer.pk), "items": [
+                {"productId": str(self.toaster.pk), "quantity": 2},
+                {"productId": str(self.kettle.pk), "quantity": 4},
+            ]},
+        }, content_type="application/json").json()
+        self.assertIn(f"Insufficient stock for product(s): {self.kettle.pk}", result["errors"][0]["message"])
+        self.assertEqual(self.stock(), {"Kettle": 3, "Toaster": 10})
+        self.assertFalse(Order.objects.exists())
+
+    def test_reserve_stock_is_all_or_nothing(self):
+        with self.assertRaisesMessage(InsufficientStock, f"product(s): {self.kettle.pk}"):
+            reserve_stock({self.toaster.pk: 5, self.kettle.pk: 4})
+        self.assertEqual(self.stock(), {"Kettle": 3, "Toaster": 10})
+        reserve_stock({self.toaster.pk: 5, self.kettle.pk: 3})
+        self.assertEqual(self.stock(), {"Kettle": 0, "Toaster": 5})
+
+    def test_bulk_orders_allocate_in_input_order(self):
+        rows = [
+            {"customer_id": self.customer.pk, "items": [{"product_id": self.kettle.pk, "quantity": quantity}]}
+            for quantity in (2, 2, 1)
+        ]
+        orders, errors = bulk_create_orders(rows)
+        self.assertEqual([order.total_amount for order in orders], [Decimal("40.00"), Decimal("20.00")])
+        self.assertEqual(errors, [f"Insufficient stock for product(s): {self.kettle.pk}"])
+        self.assertEqual(self.stock()["Kettle"], 0)
+
+    def test_restock_returns_updated_rows(self):
+        Product.objects.create(name="Blender", price=Decimal("30.00"), stock=20)
+        for returning in (True, False):
+            with self.subTest(returning=returning), transaction.atomic():
+                with patch.object(connection.features, "can_return_columns_from_insert", returning):
+                    restocked = restock_low_stock(threshold=11, amount=10)
+                self.assertEqual(
+                    sorted((product.name, product.stock) for product in restocked),
+                    [("Kettle", 13), ("Toaster", 20)],
+                )
+                self.assertEqual(self.stock()["Blender"], 20)
+                transaction.set_rollback(True)
+
+
+# ===== Response Cache Tests =====
+@override_settings(GRAPHQL_RESPONSE_CACHE={"TIMEOUT": 60, "FIELDS": ["allProducts", "allCustomers"]})
+class ResponseCacheTests(TestCase):
+    PRODUCTS = "query { allProducts(first: 10) { edges { node { name stock } } } }"
+    CUSTOMERS = "query { allCustomers(first: 10) { edges { node { name } } } }"
+
+    def setUp(self):
+        cache.clear()
+        Customer.objects.create(name="Margaret Hale", email="mhale@example.com")
+        Product.objects.create(name="Kettle", price=Decimal("20.00"), stock=3)
+
+    def post(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            body = Client().post("/graphql", {"query": query}, content_type="application/json").json()
+        self.assertNotIn("errors", body)
+        return body["data"], len(queries)
+
+    def assertHit(self, query):
+        data, queries = self.post(query)
+        self.assertEqual(queries, 0, "expected a cached response")
+        return data
+
+    def assertMiss(self, query):
+        data, queries = self.post(query)
+        self.assertGreater(queries, 0, "expected a fresh response")
+        return data
+
+    def write(self, mutation):
+        # invalidate() runs on commit, which TestCase never reaches on its own.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(mutation)
+
+    def assertWriteExpiresProducts(self, mutation):
+        self.assertMiss(self.PRODUCTS)
+        self.assertMiss(self.CUSTOMERS)
+        before = self.assertHit(self.PRODUCTS)
+        self.assertHit(self.CUSTOMERS)
+        self.write(mutation)
+        self.assertNotEqual(self.assertMiss(self.PRODUCTS), before)
+        self.assertHit(self.CUSTOMERS)
+
+    def test_save_expires_only_affected_entries(self):
+        self.assertWriteExpiresProducts(
+            'mutation { createProduct(input: {name: "Toaster", price: "5.00"}) { product { id } } }'
+        )
+
+    def test_update_expires_only_affected_entries(self):
+        # A bulk UPDATE sends no signals; restock_low_stock invalidates itself.
+        self.assertWriteExpiresProducts("mutation { updateLowStockProducts(threshold: 10, amount: 10) { success } }")
+
+
+# ===== Sales Rollup Tests =====
+class SalesRollupTests(TestCase):
+    ROLLUP = (
+        "query { days: salesRollup(groupBy: DAY) { period units revenue orderCount } "
+        "products: salesRollup(groupBy: PRODUCT) { productId units revenue orderCount } }"
+    )
+
+    def setUp(self):
+        customer = Customer.objects.create(name="Margaret Hale", email="mhale@example.com")
+        kettle, toaster = Product.objects.bulk_create([
+            Product(name="Kettle", price=Decimal("20.00"), stock=100),
+            Product(name="Toaster", price=Decimal("7.50"), stock=100),
+        ])
+        now = timezone.now()
+        self.post(
+            "mutation($input: OrderInput!) { createOrder(input: $input) { order { id } } }",
+            {"input": {"customerId": customer.pk, "orderDate": now.isoformat(), "items": [
+                {"productId": kettle.pk, "quantity": 2}, {"productId": toaster.pk},
+            ]}},
+        )
+        self.post(
+            "mutation($input: [OrderInput]!) { bulkCreateOrders(input: $input) { errors } }",
+            {"input": [
+                {"customerId": customer.pk, "orderDate": (now - timedelta(days=days)).isoformat(), "items": [
+                    {"productId": kettle.pk, "quantity": days + 1}, {"productId": toaster.pk, "quantity": 3},
+                ]}
+                for days in (0, 1, 1, 3)
+            ]},
+        )
+        self.dates = order_dates(Order.objects.all())
+
+    def post(self, query, variables=None):
+        body = Client().post(
+            "/graphql", {"query": query, "variables": variables}, content_type="application/json",
+        ).json()
+        self.assertNotIn("errors", body)
+        return body["data"]
+
+    def rows(self):
+        return list(
+            DailySalesRollup.objects.order_by("date", "product_id")
+            .values_list("date", "product_id", "units", "revenue", "order_count")
+        )
+
+    def test_incremental_rollup_matches_rebuild(self):
+        rollup, rows = self.post(self.ROLLUP), self.rows()
+        self.assertEqual(len(rollup["days"]), 3)
+        rebuild_sales_rollup(self.dates)
+        self.assertEqual(self.rows(), rows)
+        self.assertEqual(self.post(self.ROLLUP), rollup)
+
+    def test_reconcile_matches_rebuild(self):
+        rollup, rows = self.post(self.ROLLUP), self.rows()
+        DailySalesRollup.objects.update(units=0, revenue=0, order_count=0)
+        mark_sales_dirty(self.dates)
+        self.assertEqual(reconcile_sales_rollup(), len(self.dates))
+        self.assertEqual(self.rows(), rows)
+        self.assertEqual(self.post(self.ROLLUP), rollup)
+        self.assertFalse(DirtySalesDate.objects.exists())
+
+
+# ===== Export Tests =====
+class ExportTests(TestCase):
+    def test_chunk_size_must_be_positive(self):
+        client = Client()
+        client.force_login(User.objects.create_user("staff", is_staff=True))
+        for chunk_size in ("0", "-1", "many"):
+            with self.subTest(chunk_size=chunk_size):
+                response = client.get("/export/customers", {"chunk_size": chunk_size})
+                self.assertEqual(response.status_code, 400)
+        with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1."):
+            call_command("export_crm", "customers", chunk_size=0, stdout=StringIO())
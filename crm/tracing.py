@@ -0,0 +1,225 @@
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from promise import Promise, is_thenable
+
+# ===== Request Tracing =====
+# Every GraphQL request gets a RequestTrace (request.crm_trace) that counts
+# its SQL statements through a DB execute_wrapper. When the client sends the
+# X-GraphQL-Trace header the view also installs TracingMiddleware, which
+# times every resolver, and the trace is returned in Apollo tracing format
+# under extensions.tracing. Durations per operation name are aggregated for
+# the Prometheus endpoint (metrics_view).
+
+TRACE_HEADER = "HTTP_X_GRAPHQL_TRACE"
+SAMPLE_SIZE = 1000
+MAX_OPERATIONS = 200
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RequestTrace:
+    def __init__(self, resolvers=False):
+        self.start_time = datetime.now(timezone.utc)
+        self.start = time.perf_counter_ns()
+        self.end = None
+        self.operation_name = None
+        self.parsing = None
+        self.resolvers = [] if resolvers else None
+        self.sql_count = 0
+        self.sql_time = 0
+
+    # Called by Django for every statement run while the trace is active.
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter_ns() - start
+
+    def capture_sql(self):
+        """Context manager that routes every connection's queries through this trace."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    @asynccontextmanager
+    async def acapture_sql(self):
+        """capture_sql for the async view.
+
+        The async ORM runs its queries on the request's sync_to_async thread,
+        whose connections are not the event loop's, so the wrappers are
+        installed (and removed) on that thread.
+        """
+        stack = await sync_to_async(self.capture_sql)()
+        try:
+            yield stack
+        finally:
+            await sync_to_async(stack.close)()
+
+    def offset(self, timestamp):
+        return timestamp - self.start
+
+    def add_resolver(self, info, start, end):
+        self.resolvers.append({
+            "path": list(info.path),
+            "parentType": str(info.parent_type),
+            "fieldName": info.field_name,
+            "returnType": str(info.return_type),
+            "startOffset": self.offset(start),
+            "duration": end - start,
+        })
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter_ns()
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter_ns()) - self.start
+
+    def as_extensions(self):
+        end_time = datetime.now(timezone.utc)
+        tracing = {
+            "version": 1,
+            "startTime": self.start_time.isoformat(),
+            "endTime": end_time.isoformat(),
+            "duration": self.duration,
+            "execution": {"resolvers": self.resolvers or []},
+        }
+        if self.parsing:
+            # Parse and validation are one cached step here (crm/documents.py).
+            tracing["parsing"] = tracing["validation"] = self.parsing
+        return {
+            "tracing": tracing,
+            "sql": {"count": self.sql_count, "duration": self.sql_time},
+        }
+
+
+class TracingMiddleware:
+    """graphene middleware recording each resolver's wall time on the trace."""
+
+    def resolve(self, next, root, info, **args):
+        trace = getattr(info.context, "crm_trace", None)
+        if trace is None or trace.resolvers is None:
+            return next(root, info, **args)
+
+        start = time.perf_counter_ns()
+        result = next(root, info, **args)
+
+        def record(value):
+            trace.add_resolver(info, start, time.perf_counter_ns())
+            return value
+
+        if is_thenable(result):
+            return Promise.resolve(result).then(record)
+        if inspect.isawaitable(result):
+            return self.awaited(result, record)
+        return record(result)
+
+    @staticmethod
+    async def awaited(result, record):
+        return record(await result)
+
+
+# ===== Operation Metrics =====
+class OperationMetrics:
+    """Request duration and SQL counts per operation name, kept per process.
+
+    Quantiles come from the last SAMPLE_SIZE requests of each operation;
+    sums and counts cover the whole process lifetime.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def observe(self, trace):
+        name = trace.operation_name or "anonymous"
+        with self._lock:
+            if name not in self._operations and len(self._operations) >= MAX_OPERATIONS:
+                name = "other"
+            stats = self._operations.setdefault(name, {
+                "samples": deque(maxlen=SAMPLE_SIZE),
+                "count": 0,
+                "seconds": 0.0,
+                "sql_count": 0,
+                "sql_seconds": 0.0,
+            })
+            seconds = trace.duration / 1e9
+            stats["samples"].append(seconds)
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["sql_count"] += trace.sql_count
+            stats["sql_seconds"] += trace.sql_time / 1e9
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(stats, samples=sorted(stats["samples"]))
+                for name, stats in self._operations.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._operations.clear()
+
+
+operation_metrics = OperationMetrics()
+
+
+def quantile(samples, q):
+    if not samples:
+        return 0.0
+    # Nearest-rank quantile of already sorted samples.
+    return samples[max(0, math.ceil(q * len(samples)) - 1)]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(document_stats=None):
+    """Prometheus text exposition of operation_metrics (and document cache counters)."""
+    lines = [
+        "# HELP crm_graphql_request_duration_seconds GraphQL request duration by operation.",
+        "# TYPE crm_graphql_request_duration_seconds summary",
+    ]
+    snapshot = operation_metrics.snapshot()
+    for name, stats in sorted(snapshot.items()):
+        label = f'operation="{_label(name)}"'
+        for q in QUANTILES:
+            value = quantile(stats["samples"], q)
+            lines.append(f'crm_graphql_request_duration_seconds{{{label},quantile="{q}"}} {value:.6f}')
+        lines.append(f"crm_graphql_request_duration_seconds_sum{{{label}}} {stats['seconds']:.6f}")
+        lines.append(f"crm_graphql_request_duration_seconds_count{{{label}}} {stats['count']}")
+
+    lines += [
+        "# HELP crm_graphql_sql_queries_total SQL statements run by GraphQL requests.",
+        "# TYPE crm_graphql_sql_queries_total counter",
+    ]
+    for name, stats in sorted(snapshot.items()):
+        lines.append(f'crm_graphql_sql_queries_total{{operation="{_label(name)}"}} {stats["sql_count"]}')
+    lines += [
+        "# HELP crm_graphql_sql_seconds_total Time spent in SQL by GraphQL requests.",
+        "# TYPE crm_graphql_sql_seconds_total counter",
+    ]
+    for name, stats in sorted(snapshot.items()):
+        lines.append(f'crm_graphql_sql_seconds_total{{operation="{_label(name)}"}} {stats["sql_seconds"]:.6f}')
+
+    if document_stats:
+        lines += [
+            "# HELP crm_graphql_document_cache_total Document cache lookups by result.",
+            "# TYPE crm_graphql_document_cache_total counter",
+        ]
+        for result in ("hits", "misses", "persisted_hits", "persisted_misses"):
+            lines.append(f'crm_graphql_document_cache_total{{result="{result}"}} {document_stats[result]}')
+    return "\n".join(lines) + "\n"
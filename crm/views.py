@@ -1,3 +1,369 @@
-from django.shortcuts import render
+import asyncio
+import json
+import time
+from contextlib import nullcontext
+from functools import wraps
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotAllowed,
+    JsonResponse, StreamingHttpResponse,
+)
+from django.views import View
+from graphene_django.views import GraphQLView, HttpError
+from graphql.execution import ExecutionResult, execute
+from graphql.execution.executors.asyncio import AsyncioExecutor
+from graphql.language import ast
+from graphql.utils.get_operation_ast import get_operation_ast
+
+from . import response_cache
+from .cost import QueryCost, QueryCostError
+from .documents import CachedGraphQLBackend, document_cache, query_hash
+from .export import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, stream_export
+from .routers import use_replicas
+from .tracing import (
+    TRACE_HEADER, RequestTrace, TracingMiddleware, operation_metrics, render_metrics,
+)
+
+
+# ===== GraphQL Endpoint =====
+class CRMGraphQLView(GraphQLView):
+    """GraphQLView with cached documents and Automatic Persisted Queries.
+
+    Parsed and validated documents come from ``crm.documents.document_cache``.
+    A client may send ``extensions.persistedQuery.sha256Hash`` instead of the
+    query text (as GET parameters too); unknown hashes answer
+    ``PersistedQueryNotFound`` and the client retries once with the full query,
+    which registers it.
+
+    Queries whose root fields are all listed in
+    ``GRAPHQL_RESPONSE_CACHE["FIELDS"]`` are answered from
+    ``crm.response_cache`` until a write to a model they read.
+
+    Every document is costed by ``crm.cost`` before it runs; queries over
+    budget are rejected and the computed cost is returned in ``extensions``.
+
+    Each request is traced (crm/tracing.py): SQL statements are always
+    counted and fed to the per-operation metrics, and with an
+    ``X-GraphQL-Trace`` header resolver timings are returned in Apollo
+    tracing format as well.
+
+    With read replicas configured, query operations may read from them
+    (crm/routers.py); mutations and everything else use the primary.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("backend", CachedGraphQLBackend())
+        super().__init__(**kwargs)
+
+    def get_middleware(self, request):
+        trace = getattr(request, "crm_trace", None)
+        if trace is not None and trace.resolvers is not None:
+            return list(self.middleware or []) + [TracingMiddleware()]
+        return self.middleware
+
+    def get_response(self, request, data, show_graphiql=False):
+        trace = request.crm_trace = RequestTrace(resolvers=TRACE_HEADER in request.META)
+        with trace.capture_sql():
+            response = super().get_response(request, data, show_graphiql)
+        trace.finish()
+        operation_metrics.observe(trace)
+        return response
+
+    def get_persisted_hash(self, request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        persisted = (extensions or {}).get("persistedQuery")
+        if not persisted:
+            return None
+        if persisted.get("version") != 1 or not persisted.get("sha256Hash"):
+            raise HttpError(HttpResponseBadRequest("Unsupported persisted query version."))
+        return persisted["sha256Hash"]
+
+    def get_persisted_query(self, request, data, query):
+        """Resolve an Automatic Persisted Query hash to the query text."""
+        sha256 = self.get_persisted_hash(request, data)
+        if sha256 and query:
+            if query_hash(query) != sha256:
+                raise HttpError(HttpResponseBadRequest("provided sha does not match query"))
+            document_cache.register_persisted(self.schema, sha256, query)
+        elif sha256:
+            query = document_cache.get_persisted(sha256)
+            if query is None:
+                raise HttpError(HttpResponse(status=200), "PersistedQueryNotFound")
+        return query
+
+    def plan_request(self, request, query, variables, operation_name, user):
+        """Parse (cached), cost and look up ``query`` in the response cache.
+
+        Returns ``(document_ast, response cache key, result)``; ``result`` is
+        set when the request is answered without executing: parse,
+        validation and cost errors, or a response cache hit.
+        """
+        trace = getattr(request, "crm_trace", None)
+        start = time.perf_counter_ns()
+        try:
+            document_ast, errors = document_cache.get(self.schema, query)
+        except Exception as e:
+            document_ast, errors = None, [e]
+        if trace is not None:
+            trace.parsing = {
+                "startOffset": trace.offset(start),
+                "duration": time.perf_counter_ns() - start,
+            }
+            trace.operation_name = operation_name or operation_label(document_ast)
+        if errors:
+            return document_ast, None, ExecutionResult(errors=errors, invalid=True)
+
+        try:
+            cost = QueryCost(self.schema, document_ast, variables, operation_name).analyze()
+        except QueryCostError as e:
+            return document_ast, None, ExecutionResult(errors=[e], invalid=True)
+        request.crm_extensions = {"cost": cost.as_extension()}
+        key = response_cache.response_key(self.schema, query, variables, operation_name, user)
+        if key:
+            cached = response_cache.get_response(key)
+            if cached is not None:
+                return document_ast, key, ExecutionResult(data=cached)
+        return document_ast, key, None
+
+    def store_response(self, key, result):
+        if key and result is not None and not result.errors and not result.invalid:
+            response_cache.set_response(key, result.data)
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        query = self.get_persisted_query(request, data, query)
+        if not query:
+            return super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        document_ast, key, result = self.plan_request(
+            request, query, variables, operation_name, getattr(request, "user", None)
+        )
+        if result is not None:
+            return result
+        with database_routing(document_ast, operation_name):
+            result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        self.store_response(key, result)
+        return result
+
+    def json_encode(self, request, d, pretty=False):
+        # GraphQLView does not serialize ExecutionResult.extensions.
+        extensions = dict(getattr(request, "crm_extensions", None) or {})
+        trace = getattr(request, "crm_trace", None)
+        if trace is not None and trace.resolvers is not None:
+            extensions.update(trace.as_extensions())
+        if extensions:
+            d = dict(d, extensions=extensions)
+        return super().json_encode(request, d, pretty)
+
+
+
+class AsyncCRMGraphQLView(CRMGraphQLView):
+    """CRMGraphQLView executed on the event loop, for ASGI servers.
+
+    Documents run under graphql-core's AsyncioExecutor: resolvers that return
+    coroutines (the async ORM paths of crm/schema.py, crm/loaders.py and
+    crm/pagination.py) are awaited instead of holding a worker thread, so one
+    process serves many concurrent requests while they wait on the database.
+    Persisted queries, cost checks, the response cache and tracing behave as
+    in CRMGraphQLView. Mutations are not wrapped in ATOMIC_MUTATIONS; the
+    ones that need a transaction open it themselves.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.adispatch(request)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.adispatch(request)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Route to get/post like any async View, not GraphQLView.dispatch.
+        return View.dispatch(self, request, *args, **kwargs)
+
+    async def adispatch(self, request):
+        try:
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(GraphQLView.dispatch)(self, request)
+
+            if self.batch:
+                responses = [await self.aget_response(request, entry) for entry in data]
+                result = "[{}]".format(",".join(response[0] for response in responses))
+                status_code = max((response[1] for response in responses), default=200)
+            else:
+                result, status_code = await self.aget_response(request, data)
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        trace = request.crm_trace = RequestTrace(resolvers=TRACE_HEADER in request.META)
+        async with trace.acapture_sql():
+            execution_result = await self.aexecute_graphql_request(
+                request, data, query, variables, operation_name
+            )
+        trace.finish()
+        operation_metrics.observe(trace)
+
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+        if execution_result.invalid:
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+        return self.json_encode(request, response), status_code
+
+    async def aexecute_graphql_request(self, request, data, query, variables, operation_name):
+        # The persisted query and response cache lookups are blocking calls
+        # to the Django cache (Redis with CRM_CACHE_URL), so they run in a
+        # worker thread instead of stalling the event loop. They touch no
+        # database connection and their caches are thread-safe.
+        query = await sync_to_async(self.get_persisted_query, thread_sensitive=False)(request, data, query)
+        if not query:
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        user = await request.auser() if hasattr(request, "auser") else None
+        document_ast, key, result = await sync_to_async(self.plan_request, thread_sensitive=False)(
+            request, query, variables, operation_name, user
+        )
+        if result is not None:
+            return result
+
+        operation = get_operation_ast(document_ast, operation_name)
+        if request.method.lower() == "get" and operation and operation.operation != "query":
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation.operation
+                    ),
+                )
+            )
+
+        try:
+            with database_routing(document_ast, operation_name):
+                result = await execute(
+                    self.schema,
+                    document_ast,
+                    root_value=self.get_root_value(request),
+                    context_value=self.get_context(request),
+                    variable_values=variables,
+                    operation_name=operation_name,
+                    middleware=self.get_middleware(request),
+                    executor=AsyncioExecutor(loop=asyncio.get_running_loop()),
+                    return_promise=True,
+                )
+        except Exception as e:
+            return ExecutionResult(errors=[e], invalid=True)
+        if key:
+            await sync_to_async(self.store_response, thread_sensitive=False)(key, result)
+        return result
+
+
+def database_routing(document_ast, operation_name):
+    """Allow read replicas for query operations (crm/routers.py)."""
+    operation = get_operation_ast(document_ast, operation_name)
+    if operation is not None and operation.operation == "query":
+        return use_replicas()
+    return nullcontext()
+
+
+def operation_label(document_ast):
+    """Name of the document's only operation, for metrics."""
+    names = [
+        definition.name.value if definition.name else None
+        for definition in getattr(document_ast, "definitions", ())
+        if isinstance(definition, ast.OperationDefinition)
+    ]
+    return names[0] if len(names) == 1 else None
+
+
+def internal_only(view):
+    """Allow staff users and the addresses in settings.METRICS_ALLOWED_IPS.
+
+    Scrapers cannot log in, so they are let through by REMOTE_ADDR; behind
+    a reverse proxy that is the proxy's address, so keep these paths off
+    the public site there.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.user.is_staff or request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+            return view(request, *args, **kwargs)
+        return HttpResponseForbidden()
+    return wrapper
+
+
+@internal_only
+def document_cache_stats(request):
+    """Hit/miss counters of this process's document cache."""
+    return JsonResponse(document_cache.stats())
+
+
+@internal_only
+def metrics_view(request):
+    """Prometheus text endpoint for this process's GraphQL metrics."""
+    return HttpResponse(
+        render_metrics(document_cache.stats()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@staff_member_required
+def export_view(request, kind):
+    """Stream customers, products or orders as NDJSON (default) or CSV.
+
+    Query parameters other than ``format`` and ``chunk_size`` are the
+    FilterSet arguments of that kind, e.g. ``?order_date__gte=2025-01-01``.
+    """
+    fmt = request.GET.get("format", "ndjson")
+    if kind not in EXPORTS:
+        raise Http404(f"Unknown export {kind!r}")
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f"format must be one of {', '.join(FORMATS)}")
+    params = request.GET.copy()
+    params.pop("format", None)
+    try:
+        chunk_size = int(params.pop("chunk_size", [DEFAULT_CHUNK_SIZE])[-1])
+    except ValueError:
+        return HttpResponseBadRequest("chunk_size must be an integer")
+    # Checked here: the export is lazy, so a bad size would otherwise only
+    # fail once the 200 response had started streaming.
+    if chunk_size < 1:
+        return HttpResponseBadRequest("chunk_size must be at least 1")
+    try:
+        chunks = stream_export(kind, params, fmt, chunk_size)
+    except (ValidationError, ValueError) as e:
+        return HttpResponseBadRequest(str(e))
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+    return response